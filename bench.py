@@ -0,0 +1,327 @@
+"""Benchmarks for the promo.py hot paths, compared against a JSON baseline
+
+    python bench.py                       run everything and compare with bench_baseline.json
+    python bench.py --update              store this run as the new baseline
+    python bench.py --only tick,startup   run the benchmarks whose names start with these
+    python bench.py --threshold 0.25      allowed slowdown of the median before it is a regression
+
+Core benchmarks use the null renderer and a virtual clock, so they need no
+display. Tk benchmarks need an X display; without $DISPLAY a private Xvfb server
+is started when one is installed, otherwise they are skipped. Baselines are
+per machine: record one on the station hardware you care about.
+"""
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import promo
+
+BASELINE_FILE = "bench_baseline.json"
+REGRESSION_THRESHOLD = 0.25  # allowed median slowdown as a fraction of the baseline
+NOISE_FLOOR_MS = 0.05  # smaller absolute slowdowns are never reported
+BENCH_RUNS = 50  # samples per micro benchmark
+STARTUP_RUNS = 5  # process launches per startup benchmark
+TICK_SESSION_SECONDS = 600  # simulated countdown per tick benchmark sample
+TICK_RUNS = 5
+XVFB_SCREEN = "1920x1080x24"
+
+BENCH_CONFIG = {
+    'hour': 13, 'minute': 30, 'session_duration': TICK_SESSION_SECONDS, 'shutdown_delay': 0,
+    'alert_dry_run': True, 'shutdown_dry_run': True, 'analytics_db': "", 'metrics': False,
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def describe(samples):
+    """Median and p95 of samples in seconds, as milliseconds"""
+    values = sorted(samples)
+    return {
+        'median_ms': round(percentile(values, 0.5) * 1000, 4),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 4),
+        'runs': len(values),
+    }
+
+
+def measure(function, runs=BENCH_RUNS, setup=None, teardown=None):
+    samples = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+        if teardown is not None:
+            teardown()
+    return describe(samples)
+
+
+class Session:
+    """Core and renderer under test, with the countdown worker parked on a virtual clock"""
+
+    def __init__(self, backend, config_path):
+        self.clock = promo.VirtualClock()
+        self.view = promo.TkRenderer() if backend == 'tk' else promo.NullRenderer(clock=self.clock)
+        self.core = promo.PromoCore(self.view, promo.ConfigWatcher(config_path), record=False, clock=self.clock)
+
+    def end_countdown(self):
+        # Let the parked worker thread exit before the next transition
+        if self.core.running:
+            self.core.running = False
+            self.core.timer.stop()
+
+    def enter_countdown(self):
+        self.core.start_countdown()
+        self.end_countdown()
+
+
+def bench_tick(config_path):
+    """Per simulated second of a countdown: worker, alerts, render state and drain"""
+    def run_session():
+        clock = promo.VirtualClock()
+        view = promo.NullRenderer(clock=clock)
+        core = promo.PromoCore(view, promo.ConfigWatcher(config_path), record=False, clock=clock)
+        core.start_countdown(TICK_SESSION_SECONDS)
+        view.mainloop()  # the dry-run shutdown quits the loop
+
+    result = measure(run_session, TICK_RUNS)
+    for key in ('median_ms', 'p95_ms'):
+        result[key] = round(result[key] / TICK_SESSION_SECONDS, 4)
+    return {'tick.null': result}
+
+
+def bench_transitions(backend, config_path):
+    """Screen changes as the core drives them, including layout on Tk"""
+    session = Session(backend, config_path)
+    core, view = session.core, session.view
+    results = {}
+    # Each sample enters the screen from the one before it in the waiting -> promo -> countdown cycle
+    for name, previous, function in (('waiting', session.enter_countdown, core.show_waiting_screen),
+                                     ('promo', core.show_waiting_screen, core.show_promo_screen),
+                                     ('countdown', core.show_promo_screen, core.start_countdown)):
+        def setup(previous=previous):
+            previous()
+            view.flush()
+
+        def transition(function=function):
+            function()
+            view.flush()
+
+        results[f'transition.{name}.{backend}'] = measure(transition, setup=setup, teardown=session.end_countdown)
+    if backend == 'tk':
+        results.update(bench_tk_widgets(session))
+        view.root.destroy()
+    return results
+
+
+def bench_tk_widgets(session):
+    core, view = session.core, session.view
+    results = {}
+
+    # Per-tick redraw of the countdown digits, Label against cached canvas glyphs
+    for widget in promo.COUNTDOWN_WIDGETS:
+        # Leave the countdown screen so it is rebuilt with this widget
+        core.show_waiting_screen()
+        view.screens.pop('countdown')[0].destroy()
+        core.config = core.config._replace(countdown_widget=widget)
+        core.start_countdown()
+        texts = iter(promo.format_clock(seconds) for seconds in range(3540, 0, -1))
+
+        def update_countdown(texts=texts):
+            view.update_countdown(text=next(texts))
+            view.flush()
+
+        results[f'update_countdown.{widget}.tk'] = measure(update_countdown)
+        session.end_countdown()
+
+    # Toast creation and display from the warm pool
+    toasts = promo.ToastManager(view.root, min_interval_ms=0)
+    slots = []
+
+    def create_toast():
+        slots.append(toasts.new_slot())
+        view.flush()
+
+    results['popup.create.tk'] = measure(create_toast)
+    for slot in slots:
+        slot['window'].destroy()
+    count = iter(range(10 ** 6))
+
+    def show_toast():
+        toasts.show(f"{next(count)} MINUTES LEFT!\nTime is running out", '#FF9900', 60000, 'black', anchor='right')
+        view.flush()
+
+    results['popup.show.tk'] = measure(show_toast, teardown=toasts.clear)
+
+    # PIN dialog open time
+    def close_pin_dialog():
+        view.pin_window.grab_release()
+        view.pin_window.destroy()
+        view.flush()
+
+    def open_pin_dialog():
+        view.show_pin_dialog()
+        view.flush()
+
+    results['pin_dialog.tk'] = measure(open_pin_dialog, teardown=close_pin_dialog)
+    return results
+
+
+def bench_startup(backend, workdir):
+    """Process start until the first frame is drawn and the app exits"""
+    command = [sys.executable, os.path.abspath(promo.__file__), '--exit-after-first-frame', '--backend', backend]
+
+    def launch():
+        result = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{backend} startup failed:\n{result.stdout}{result.stderr}")
+
+    return {f'startup.{backend}': measure(launch, STARTUP_RUNS)}
+
+
+def bench_import(workdir):
+    """Cumulative `import promo` time reported by -X importtime"""
+    here = os.path.dirname(os.path.abspath(promo.__file__))
+    samples = []
+    for _ in range(STARTUP_RUNS):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import promo'],
+                                cwd=here, capture_output=True, text=True)
+        for line in result.stderr.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == 'promo':
+                samples.append(int(parts[1]) / 1e6)
+    return {'import': describe(samples)}
+
+
+def start_xvfb():
+    """Start a private Xvfb server if there is no display; returns the process or None"""
+    if os.environ.get('DISPLAY') or not shutil.which('Xvfb'):
+        return None
+    read_fd, write_fd = os.pipe()
+    server = subprocess.Popen(['Xvfb', '-displayfd', str(write_fd), '-screen', '0', XVFB_SCREEN, '-nolisten', 'tcp'],
+                              pass_fds=(write_fd,), stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as f:
+        display = f.readline().strip()
+    if not display:
+        server.kill()
+        return None
+    os.environ['DISPLAY'] = f":{display}"
+    return server
+
+
+def tk_available():
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception as e:  # ImportError, or TclError without a display
+        print(f"Tk benchmarks skipped: {e}")
+        return False
+    return True
+
+
+def run_benchmarks(only=None):
+    results = {}
+    wanted = (lambda name: True) if not only else (lambda name: any(name.startswith(prefix) for prefix in only))
+    with tempfile.TemporaryDirectory() as workdir:
+        config_path = os.path.join(workdir, promo.CONFIG_FILE)
+        with open(config_path, 'w') as f:
+            json.dump(BENCH_CONFIG, f)
+        quiet = io.StringIO()
+        if wanted('import'):
+            results.update(bench_import(workdir))
+        if wanted('startup'):
+            results.update(bench_startup('null', workdir))
+        with contextlib.redirect_stdout(quiet):
+            if wanted('tick'):
+                results.update(bench_tick(config_path))
+            if wanted('transition'):
+                results.update(bench_transitions('null', config_path))
+        tk_wanted = any(wanted(name) for name in ('transition', 'update_countdown', 'popup', 'pin_dialog', 'startup'))
+        if tk_wanted:
+            xvfb = start_xvfb()
+            try:
+                if tk_available():
+                    if wanted('startup'):
+                        results.update(bench_startup('tk', workdir))
+                    with contextlib.redirect_stdout(quiet):
+                        results.update(bench_transitions('tk', config_path))
+            finally:
+                if xvfb is not None:
+                    xvfb.terminate()
+                    xvfb.wait()
+    return {name: value for name, value in results.items() if wanted(name)}
+
+
+def compare(results, baseline, threshold):
+    """Print one line per benchmark; returns the names that regressed"""
+    regressions = []
+    print(f"{'benchmark':<28} {'median ms':>10} {'p95 ms':>10} {'baseline':>10} {'change':>8}")
+    for name, result in sorted(results.items()):
+        line = f"{name:<28} {result['median_ms']:>10.4f} {result['p95_ms']:>10.4f}"
+        base = baseline.get(name)
+        if base is not None:
+            change = (result['median_ms'] - base['median_ms']) / base['median_ms'] if base['median_ms'] else 0.0
+            line += f" {base['median_ms']:>10.4f} {change:>+7.0%}"
+            if change > threshold and result['median_ms'] - base['median_ms'] > NOISE_FLOOR_MS:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Promo Timer benchmarks")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help=f"baseline JSON (default {BASELINE_FILE})")
+    parser.add_argument('--update', action='store_true', help="write this run to the baseline file")
+    parser.add_argument('--output', help="also write this run's results to a JSON file")
+    parser.add_argument('--only', help="comma-separated benchmark name prefixes")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help=f"allowed median slowdown before failing (default {REGRESSION_THRESHOLD})")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.only.split(',') if args.only else None)
+    report = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f).get('results', {})
+    regressions = compare(results, baseline, args.threshold)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+    if args.update:
+        if args.only and os.path.exists(args.baseline):
+            # Keep the baseline of benchmarks that were not run
+            with open(args.baseline, 'r') as f:
+                report['results'] = dict(json.load(f).get('results', {}), **results)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"Baseline written to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}; run with --update to record one")
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+"""Fleet controller for promo.py stations
+
+Every station with "fleet_controller" set in its timer_config.json keeps one TCP
+connection to this controller. Both sides send newline-delimited JSON:
+
+    station -> controller   {"type": "hello", "station": ID, "token": T, "status": {...}}
+                            {"type": "heartbeat", "status": {...}}
+                            {"type": "reply", "id": N, "result": {...}}
+    controller -> station   {"type": "request", "id": N, "command": "extend 300"}
+                            {"type": "request", "id": N, "config": {"hour": 13, "pin": "4321"}}
+
+Operators talk to the same port with one {"type": "admin", ...} line per connection.
+Stations and operators use different secrets: the station token sits in every
+kiosk's timer_config.json, so it must not be enough to command the fleet.
+
+    python fleet.py serve --admin-token A [--port 7700] [--token T] [--config fleet_config.json]
+    python fleet.py --admin-token A list | stats
+    python fleet.py --admin-token A push settings.json [--stations a,b]
+    python fleet.py --admin-token A broadcast "extend 300" [--stations a,b]
+    python fleet.py loadtest [--stations 1000] [--duration 20]
+
+The admin token can also come from the FLEET_ADMIN_TOKEN environment variable.
+"""
+import asyncio
+import hmac
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+DEFAULT_PORT = 7700  # promo.FLEET_PORT
+REQUEST_TIMEOUT = 10  # seconds a station has to answer a request
+HEARTBEAT_INTERVAL = 5  # promo.FLEET_HEARTBEAT_INTERVAL
+STREAM_LIMIT = 1024 * 1024  # longest accepted JSON line
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def describe_latencies(latencies):
+    values = sorted(latencies)
+    return {
+        'p50_ms': round(percentile(values, 0.5) * 1000, 2),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+
+class Station:
+    """One connected promo.py instance"""
+    __slots__ = ('id', 'writer', 'status', 'last_seen', 'heartbeats')
+
+    def __init__(self, station_id, writer, status):
+        self.id = station_id
+        self.writer = writer
+        self.status = status
+        self.last_seen = time.monotonic()
+        self.heartbeats = 0
+
+
+class FleetController:
+    """Tracks station status from heartbeats and fans requests out to all stations at once"""
+
+    def __init__(self, token="", admin_token="", config=None, config_path=None):
+        self.token = token  # stations' fleet_token
+        self.admin_token = admin_token  # operators only; never stored on a station
+        self.config = config or {}  # pushed to every station when it connects
+        self.config_path = config_path
+        self.stations = {}  # id -> Station
+        self.pending = {}  # request id -> Future of the station's reply
+        self.request_ids = itertools.count(1)
+        self.heartbeats = 0
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=STREAM_LIMIT, backlog=1024)
+        print(f"Fleet controller listening on {host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            hello = json.loads(await reader.readline())
+        except (ValueError, ConnectionError):
+            writer.close()
+            return
+        if not isinstance(hello, dict) or not self.authorized(hello):
+            writer.write(b'{"ok": false, "error": "bad token"}\n')
+            writer.close()
+            return
+        if hello.get('type') == 'admin':
+            result = await self.admin(hello)
+            writer.write((json.dumps(result) + "\n").encode())
+            await writer.drain()
+            writer.close()
+            return
+        if hello.get('type') != 'hello' or not hello.get('station'):
+            writer.close()
+            return
+        status = hello.get('status', {})
+        station = Station(str(hello['station']), writer, status if isinstance(status, dict) else {})
+        previous = self.stations.get(station.id)
+        if previous is not None:
+            previous.writer.close()  # a restarted station replaces its old connection
+        self.stations[station.id] = station
+        if self.config:
+            asyncio.ensure_future(self.request(station, {'config': self.config}))
+        try:
+            async for line in reader:
+                self.on_message(station, line)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            if self.stations.get(station.id) is station:
+                del self.stations[station.id]
+            writer.close()
+
+    def authorized(self, hello):
+        """Admin requests need the admin token, stations the station token"""
+        expected = self.admin_token if hello.get('type') == 'admin' else self.token
+        token = hello.get('token', "")
+        if not isinstance(token, str) or (hello.get('type') == 'admin' and not expected):
+            return False
+        return hmac.compare_digest(token.encode(), expected.encode())
+
+    def on_message(self, station, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(message, dict):
+            return  # only JSON objects are messages
+        station.last_seen = time.monotonic()
+        kind = message.get('type')
+        if kind == 'heartbeat':
+            status = message.get('status', {})
+            if isinstance(status, dict):
+                station.status = status
+            station.heartbeats += 1
+            self.heartbeats += 1
+        elif kind == 'reply' and isinstance(message.get('id'), int):
+            future = self.pending.pop(message['id'], None)
+            result = message.get('result', {})
+            if future is not None and not future.done():
+                future.set_result(result if isinstance(result, dict) else {'ok': False, 'error': "bad reply"})
+
+    async def request(self, station, body, timeout=REQUEST_TIMEOUT):
+        """Send one request and wait for its reply; returns (result, seconds)"""
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        started = time.perf_counter()
+        try:
+            station.writer.write((json.dumps(dict(body, type='request', id=request_id)) + "\n").encode())
+            await station.writer.drain()
+            result = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            result = {'ok': False, 'error': "timed out"}
+        except ConnectionError as e:
+            result = {'ok': False, 'error': f"disconnected: {e}"}
+        finally:
+            self.pending.pop(request_id, None)
+        return result, time.perf_counter() - started
+
+    async def fan_out(self, body, station_ids=None):
+        """Send body to every (or the listed) station concurrently and summarise the replies"""
+        if station_ids is None:
+            targets = list(self.stations.values())
+        else:
+            targets = [self.stations[i] for i in station_ids if i in self.stations]
+        started = time.perf_counter()
+        replies = await asyncio.gather(*(self.request(station, body) for station in targets))
+        failed = {station.id: result.get('error', "failed")
+                  for station, (result, _) in zip(targets, replies) if not result.get('ok')}
+        summary = {
+            'ok': not failed,
+            'stations': len(targets),
+            'failed': failed,
+            'seconds': round(time.perf_counter() - started, 4),
+        }
+        summary.update(describe_latencies([seconds for _, seconds in replies]))
+        if station_ids is not None:
+            summary['unknown'] = sorted(set(station_ids) - set(self.stations))
+        return summary
+
+    async def admin(self, message):
+        action = message.get('action')
+        station_ids = message.get('stations')
+        if action == 'list':
+            now = time.monotonic()
+            return {'ok': True, 'stations': {
+                station.id: dict(station.status, seen_seconds_ago=round(now - station.last_seen, 1))
+                for station in self.stations.values()}}
+        if action == 'stats':
+            return {'ok': True, 'stations': len(self.stations), 'heartbeats': self.heartbeats,
+                    'pending': len(self.pending), 'cpu_seconds': round(time.process_time(), 3)}
+        if action == 'push':
+            config = message.get('config')
+            if not isinstance(config, dict):
+                return {'ok': False, 'error': "push needs a config object"}
+            summary = await self.fan_out({'config': config}, station_ids)
+            # Remember fleet-wide settings for stations that connect later,
+            # unless every connected station rejected them
+            if station_ids is None and len(summary['failed']) < max(summary['stations'], 1):
+                self.config.update(config)
+                self.save_config()
+            return summary
+        if action == 'broadcast':
+            return await self.fan_out({'command': str(message.get('command', ""))}, station_ids)
+        return {'ok': False, 'error': f"unknown action {action!r}"}
+
+    def save_config(self):
+        if not self.config_path:
+            return
+        temp_path = self.config_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.config, f, indent=4)
+        os.replace(temp_path, self.config_path)
+
+
+def admin_request(host, port, token, **message):
+    """Send one admin request to a running controller and return its reply"""
+    with socket.create_connection((host, port), timeout=REQUEST_TIMEOUT + 5) as connection:
+        connection.sendall((json.dumps(dict(message, type='admin', token=token)) + "\n").encode())
+        return json.loads(connection.makefile('r', encoding='utf-8').readline())
+
+
+# Load test: fake stations speaking the agent protocol, against a controller subprocess
+async def fake_station(host, port, station_id, token, heartbeat, stop):
+    reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+    status = {'ok': True, 'screen': 'waiting', 'running': False, 'paused': False, 'remaining': 0}
+    writer.write((json.dumps({'type': 'hello', 'station': station_id, 'token': token,
+                              'status': status}) + "\n").encode())
+
+    async def beat():
+        # Spread heartbeats over the interval like independently started stations
+        await asyncio.sleep(heartbeat * (hash(station_id) % 1000) / 1000)
+        while not stop.is_set():
+            writer.write((json.dumps({'type': 'heartbeat', 'status': status}) + "\n").encode())
+            await asyncio.sleep(heartbeat)
+
+    beating = asyncio.ensure_future(beat())
+    try:
+        while not stop.is_set():
+            line = await reader.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            if message.get('command', '').startswith('extend'):
+                status['remaining'] += int(message['command'].split()[1])
+            writer.write((json.dumps({'type': 'reply', 'id': message['id'],
+                                      'result': dict(status)}) + "\n").encode())
+    finally:
+        beating.cancel()
+        writer.close()
+
+
+async def run_load_test(stations, duration, port, token, heartbeat):
+    import secrets
+    admin_token = secrets.token_hex(16)
+    controller = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--host', '127.0.0.1',
+         '--port', str(port), '--token', token, '--admin-token', admin_token, 'serve'],
+        stdout=subprocess.PIPE, text=True)
+    try:
+        if not controller.stdout.readline():  # "listening" line
+            print("Controller failed to start")
+            return 1
+        stop = asyncio.Event()
+        started = time.perf_counter()
+        tasks = []
+        for index in range(stations):
+            tasks.append(asyncio.ensure_future(
+                fake_station('127.0.0.1', port, f"station-{index:04d}", token, heartbeat, stop)))
+            if index % 100 == 99:
+                await asyncio.sleep(0)  # let the accepts keep up
+        loop = asyncio.get_running_loop()
+
+        def admin(**message):
+            return loop.run_in_executor(None, lambda: admin_request('127.0.0.1', port, admin_token, **message))
+
+        while (await admin(action='stats'))['stations'] < stations:
+            await asyncio.sleep(0.1)
+        print(f"{stations} stations connected in {time.perf_counter() - started:.2f} s")
+        cpu_start = (await admin(action='stats'))['cpu_seconds']
+        test_started = time.perf_counter()
+        broadcasts = []
+        while time.perf_counter() - test_started < duration:
+            broadcasts.append(await admin(action='broadcast', command='extend 60'))
+            await asyncio.sleep(1)
+        push = await admin(action='push', config={'pin': "4321"})
+        stats = await admin(action='stats')
+        elapsed = time.perf_counter() - test_started
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        controller.terminate()
+        controller.wait()
+
+    failed = sum(len(b['failed']) for b in broadcasts)
+    print(f"{len(broadcasts)} broadcasts to {stations} stations, {failed} failed replies")
+    print("Broadcast round trip, slowest station per broadcast: "
+          + ", ".join(f"{key} {value}" for key, value in
+                      describe_latencies([b['max_ms'] / 1000 for b in broadcasts]).items()))
+    print("Station reply latency (median broadcast): "
+          + ", ".join(f"{key} {sorted(b[key] for b in broadcasts)[len(broadcasts) // 2]}"
+                      for key in ('p50_ms', 'p99_ms', 'max_ms')))
+    print(f"Config push: {push['stations']} stations in {push['seconds'] * 1000:.0f} ms")
+    print(f"Heartbeats handled: {stats['heartbeats']}")
+    print(f"Controller CPU: {stats['cpu_seconds'] - cpu_start:.2f} s over {elapsed:.1f} s "
+          f"({(stats['cpu_seconds'] - cpu_start) / elapsed * 100:.0f}% of one core)")
+    return 0 if failed == 0 else 1
+
+
+def raise_open_file_limit():
+    try:
+        import resource
+    except ImportError:
+        return  # not available on Windows
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Promo Timer fleet controller")
+    parser.add_argument('--host', default='127.0.0.1', help="controller address (serve: interface to bind)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--token', default="", help="station secret, must match fleet_token on the stations")
+    parser.add_argument('--admin-token', default=os.environ.get('FLEET_ADMIN_TOKEN', ""),
+                        help="operator secret for list/stats/push/broadcast (default $FLEET_ADMIN_TOKEN)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help="run the controller")
+    serve_parser.add_argument('--config', help="JSON settings pushed to every station, updated by push")
+    commands.add_parser('list', help="show every connected station and its last status")
+    commands.add_parser('stats', help="show controller counters")
+    push_parser = commands.add_parser('push', help="push settings from a JSON file")
+    push_parser.add_argument('file')
+    push_parser.add_argument('--stations', help="comma-separated station ids (default: all)")
+    broadcast_parser = commands.add_parser('broadcast', help="send a control command, e.g. 'extend 300'")
+    broadcast_parser.add_argument('control_command')
+    broadcast_parser.add_argument('--stations', help="comma-separated station ids (default: all)")
+    load_parser = commands.add_parser('loadtest', help="run fake stations against a local controller")
+    load_parser.add_argument('--stations', type=int, default=1000)
+    load_parser.add_argument('--duration', type=float, default=20, help="seconds of broadcasting")
+    load_parser.add_argument('--heartbeat', type=float, default=HEARTBEAT_INTERVAL)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        if not args.admin_token or args.admin_token == args.token:
+            print("serve needs an --admin-token (or FLEET_ADMIN_TOKEN) different from the station --token")
+            return 2
+        raise_open_file_limit()
+        config = {}
+        if args.config and os.path.exists(args.config):
+            with open(args.config, 'r') as f:
+                config = json.load(f)
+        try:
+            asyncio.run(FleetController(args.token, args.admin_token, config, args.config).serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == 'loadtest':
+        raise_open_file_limit()
+        port = args.port if args.port != DEFAULT_PORT else DEFAULT_PORT + 1
+        return asyncio.run(run_load_test(args.stations, args.duration, port, args.token or "loadtest",
+                                         args.heartbeat))
+
+    message = {'action': args.command}
+    if getattr(args, 'stations', None):
+        message['stations'] = args.stations.split(',')
+    if args.command == 'push':
+        with open(args.file, 'r') as f:
+            message['config'] = json.load(f)
+    elif args.command == 'broadcast':
+        message['command'] = args.control_command
+    try:
+        reply = admin_request(args.host, args.port, args.admin_token, **message)
+    except OSError as e:
+        print(f"Cannot reach controller at {args.host}:{args.port}: {e}")
+        return 1
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get('ok') else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,306 +1,3110 @@
-import tkinter as tk
-from tkinter import messagebox
 import time
+STARTUP_T0 = time.perf_counter()  # reference point for time-to-first-frame
+
 import threading
 import os
-import platform
 import datetime
 import json
 import sys
-import keyboard  # pip install keyboard
+import math
+import types
+import collections
+import bisect
+import heapq
+import queue
+import selectors
 
 # VERSION WITH CONFIG FILE AND PIN TO CLOSE
-def main():
-    # Create window
-    root = tk.Tk()
-    root.title("Promo Timer")
-    
-    # Variables
-    time_left = 3540  # 59 minutes for countdown
-    running = False
-    fullscreen_mode = True
-    activation_time = None
-    waiting_for_schedule = False
-    pin_code = "1234"  # Default PIN to close app
-    pin_attempts = 0
-    max_pin_attempts = 3
-    
-    # Try to read config from file
-    config_file = "timer_config.json"
-    default_hour = 13  # 1 PM
-    default_minute = 30
-    default_second = 0
-    
-    try:
-        if os.path.exists(config_file):
-            with open(config_file, 'r') as f:
-                config = json.load(f)
-                SCHEDULED_HOUR = config.get('hour', default_hour)
-                SCHEDULED_MINUTE = config.get('minute', default_minute)
-                SCHEDULED_SECOND = config.get('second', default_second)
-                pin_code = str(config.get('pin', pin_code))  # Read PIN from config
-        else:
-            # Create default config file
-            config = {
-                'hour': default_hour,
-                'minute': default_minute,
-                'second': default_second,
-                'pin': pin_code,
-                'note': 'Schedule time in 24-hour format. hour: 0-23, minute: 0-59, second: 0-59'
+FIRST_FRAME_TARGET_MS = 1000  # process start to first frame, checked by --startup-check
+IMPORT_BUDGET_MS = 100  # cumulative `import promo` time reported by -X importtime
+
+TICK_PHASE_MS = 5  # fire ticks just after the wall-clock second boundary
+# Countdown seconds turn over this far into a wall-clock second, half a second
+# away from the tick that draws them, so the worker and the drain never race
+COUNTDOWN_PHASE = 0.5
+
+# Optional instrumentation (config "metrics": true)
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # seconds
+METRICS_WRITE_INTERVAL = 10  # seconds between JSON snapshots
+METRICS_PROBE_MS = 250  # mainloop lag probe period
+
+# Stall detector (config "stall_threshold_ms" above 0)
+STALL_HEARTBEAT_MS = 100  # mainloop heartbeat period
+STALL_SAMPLE_MS = 10  # main thread stack sampling period while stalled
+STALL_MAX_SAMPLES = 1000  # stop sampling a single stall after this many samples
+STALL_LOG_MAX_BYTES = 1024 * 1024  # rotate the stall log at this size
+STALL_LOG_BACKUPS = 3
+
+CONFIG_FILE = "timer_config.json"
+CONFIG_CHECK_INTERVAL = 60  # seconds between config file mtime checks
+
+JOURNAL_FILE = "session_journal.log"
+JOURNAL_FSYNC_INTERVAL = 15  # max seconds of tick records that can be lost on a crash
+
+ANALYTICS_BATCH_SECONDS = 2  # writer thread collects events this long before one transaction
+ANALYTICS_BATCH_SIZE = 100
+ANALYTICS_REPORT_DAYS = 90  # default range of `promo.py report`
+
+TOAST_POOL_SIZE = 3  # toast windows kept alive and reused
+TOAST_MIN_INTERVAL_MS = 300  # minimum gap between two toasts appearing
+TOAST_QUEUE_LIMIT = 10  # oldest queued toasts are dropped beyond this
+TOAST_SIZES = {'center': (400, 80), 'right': (350, 100)}  # width, height per anchor
+TOAST_MARGIN = 20
+TOAST_GAP = 10
+
+FOCUS_FALLBACK_INTERVAL = 60  # seconds between fallback focus checks; shares the waiting refresh wakeup
+FOCUS_EVENT_DELAY_MS = 50  # let focus settle before deciding to reclaim it
+
+HOTKEY = 'ctrl+shift+p'  # opens the PIN dialog
+HOTKEY_BACKENDS = ('auto', 'keyboard', 'tk')
+HOTKEY_POLL_MS = 100  # fallback poll for hotkey presses when no wakeup mechanism works
+
+RENDER_BACKENDS = ('tk', 'curses', 'null')
+FILE_READABLE = 2  # tkinter.READABLE, without importing tkinter
+CURSES_CONSOLE_LINES = 50  # printed lines kept while curses owns the terminal
+COUNTDOWN_WIDGETS = ('label', 'canvas')  # how the Tk countdown screen draws its digits
+MONITOR_DETECT_TIMEOUT = 2  # seconds to wait for xrandr before assuming a single monitor
+
+CONTROL_COMMANDS = ('status', 'pause', 'resume', 'extend', 'start', 'stop', 'reload')
+CONTROL_TIMEOUT = 5  # seconds a client waits for the Tk thread to answer
+CONTROL_POLL_MS = 50  # fallback poll for control requests when no wakeup mechanism works
+WAKER_IDLE_POLL_MS = 1000  # the fallback polls back off to this while nothing arrives
+
+# Fleet agent (config "fleet_controller"), see fleet.py for the controller
+FLEET_PORT = 7700
+FLEET_HEARTBEAT_INTERVAL = 5  # seconds between status reports
+FLEET_RECONNECT_MAX = 60  # cap for the reconnect backoff in seconds
+# Settings the controller may push; anything that runs commands stays local
+FLEET_CONFIG_KEYS = (
+    'hour', 'minute', 'second', 'pin', 'max_pin_attempts', 'session_duration',
+    'warning_seconds', 'urgent_seconds', 'popup_duration', 'windows', 'closed_dates',
+    'timezone', 'persistent',
+)
+
+# Pre-shutdown hooks run concurrently while the TIME'S UP countdown is shown
+HOOK_DEFAULT_TIMEOUT = 30  # seconds per step unless the step sets "timeout"
+SHUTDOWN_COMMANDS = {
+    'Windows': "shutdown /s /t 1",
+    'Linux': "shutdown -h now",
+    'Darwin': "sudo shutdown -h now",
+}
+
+# Waiting screen refresh policy: (seconds until activation above, refresh interval)
+WAITING_REFRESH_POLICY = ((300, 60), (0, 1))
+WAKEUP_REPORT_INTERVAL = 3600  # print tick wakeup counts once an hour
+
+SIMULATE_LEAD = 60  # `promo.py simulate` starts this many seconds before the next activation
+SIMULATE_PRESS_START = 5  # seconds after the promo screen appears until START is pressed
+SIMULATE_HOURS = 24  # simulated time limit for schedules that never shut down
+
+
+# Time sources: everything that reads the time or sleeps goes through a clock
+class SystemClock:
+    """Real time from the time module"""
+    virtual = False
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def event(self):
+        return threading.Event()
+
+    def wait(self, event, timeout=None):
+        return event.wait(timeout)
+
+    def start_thread(self, target, *args):
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+
+SYSTEM_CLOCK = SystemClock()
+
+
+class VirtualClock:
+    """Simulated time that only moves when sleep() or advance() is called
+
+    Worker threads started with start_thread() take part in the simulation:
+    advance() wakes their waits in deadline order and returns only once every
+    worker is waiting again or has finished, so runs are deterministic.
+    """
+    virtual = True
+
+    def __init__(self, start=None):
+        self.wall = time.time() if start is None else start
+        self.mono = 0.0
+        self.cond = threading.Condition()
+        self.busy = 0  # workers running rather than waiting
+        self.waiters = []  # [deadline or None, event, woken]
+
+    def time(self):
+        with self.cond:
+            return self.wall
+
+    def monotonic(self):
+        with self.cond:
+            return self.mono
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def event(self):
+        return VirtualEvent(self)
+
+    def wait(self, event, timeout=None):
+        with self.cond:
+            if event.is_set():
+                return True
+            if timeout is not None and timeout <= 0:
+                return False
+            waiter = [None if timeout is None else self.mono + timeout, event, False]
+            self.waiters.append(waiter)
+            self.busy -= 1
+            self.cond.notify_all()
+            while not waiter[2]:
+                self.cond.wait()
+            return event.is_set()
+
+    def wake(self, event):
+        """Called by VirtualEvent.set(): release the workers waiting on event"""
+        with self.cond:
+            self.release(lambda waiter: waiter[1] is event)
+
+    def release(self, match):
+        """Wake waiters for which match(waiter) is true; they count as busy again"""
+        for waiter in [waiter for waiter in self.waiters if match(waiter)]:
+            waiter[2] = True
+            self.waiters.remove(waiter)
+            self.busy += 1
+        self.cond.notify_all()
+
+    def settle(self):
+        while self.busy:
+            self.cond.wait()
+
+    def advance(self, seconds):
+        """Move time forward, running due worker wake-ups in order"""
+        with self.cond:
+            target = self.mono + max(0.0, seconds)
+            while True:
+                self.settle()
+                due = [waiter[0] for waiter in self.waiters if waiter[0] is not None and waiter[0] <= target]
+                if not due:
+                    break
+                self.set_mono(min(due))
+                self.release(lambda waiter: waiter[0] is not None and waiter[0] <= self.mono)
+            self.set_mono(target)
+
+    def set_mono(self, value):
+        self.wall += value - self.mono
+        self.mono = value
+
+    def start_thread(self, target, *args):
+        def run():
+            try:
+                target(*args)
+            finally:
+                with self.cond:
+                    self.busy -= 1
+                    self.cond.notify_all()
+
+        with self.cond:
+            self.busy += 1
+        threading.Thread(target=run, daemon=True).start()
+
+
+class VirtualEvent(threading.Event):
+    """threading.Event whose set() wakes workers waiting on a VirtualClock"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def set(self):
+        super().set()
+        self.clock.wake(self)
+
+
+# Countdown timer driven by a monotonic deadline instead of sleep(1) steps
+class TimerEngine:
+    """Drift-free countdown timer based on the clock's monotonic time
+
+    With a phase, every deadline is shifted by at most half a second so the
+    remaining whole seconds change that far past a wall-clock second.
+    """
+
+    def __init__(self, duration, clock=SYSTEM_CLOCK, phase=None):
+        self.duration = duration
+        self.clock = clock
+        self.phase = phase
+        self.deadline = None  # monotonic time when the countdown reaches zero
+        self.paused_left = None  # remaining seconds while paused
+        self.lock = threading.Lock()
+        self.wake = clock.event()  # interrupts wait_for_tick on changes
+
+    def start(self, duration=None):
+        with self.lock:
+            if duration is not None:
+                self.duration = duration
+            self.deadline = self.aligned(self.clock.monotonic() + self.duration)
+            self.paused_left = None
+        self.wake.set()
+
+    def pause(self):
+        with self.lock:
+            if self.deadline is not None and self.paused_left is None:
+                self.paused_left = max(0.0, self.deadline - self.clock.monotonic())
+        self.wake.set()
+
+    def resume(self):
+        with self.lock:
+            if self.paused_left is not None:
+                self.deadline = self.aligned(self.clock.monotonic() + self.paused_left)
+                self.paused_left = None
+        self.wake.set()
+
+    def extend(self, seconds):
+        with self.lock:
+            if self.paused_left is not None:
+                self.paused_left += seconds
+            elif self.deadline is not None:
+                # Extending a finished countdown restarts it from now
+                self.deadline = self.aligned(max(self.deadline, self.clock.monotonic()) + seconds)
+        self.wake.set()
+
+    def aligned(self, deadline):
+        """Monotonic deadline moved onto the wall-clock phase, if there is one"""
+        if self.phase is None:
+            return deadline
+        wall = self.clock.time() + deadline - self.clock.monotonic()
+        return deadline + round(wall - self.phase) + self.phase - wall
+
+    def stop(self):
+        with self.lock:
+            self.deadline = None
+            self.paused_left = None
+        self.wake.set()
+
+    def is_running(self):
+        return self.deadline is not None and self.paused_left is None
+
+    def is_paused(self):
+        return self.paused_left is not None
+
+    def is_stopped(self):
+        """Stopped before reaching zero (or never started)"""
+        return self.deadline is None and self.paused_left is None
+
+    def remaining(self):
+        """Exact remaining time in seconds (float)"""
+        with self.lock:
+            if self.paused_left is not None:
+                return self.paused_left
+            if self.deadline is None:
+                return 0.0
+            return max(0.0, self.deadline - self.clock.monotonic())
+
+    def seconds_left(self):
+        """Remaining whole seconds as shown on the display"""
+        return math.ceil(self.remaining())
+
+    def wait_for_tick(self):
+        """Block until the displayed second changes or the timer is changed"""
+        self.wake.clear()
+        with self.lock:
+            if self.paused_left is not None:
+                delay = None  # sleep until resumed or stopped
+            elif self.deadline is None:
+                return 0
+            else:
+                left = max(0.0, self.deadline - self.clock.monotonic())
+                # Time until remaining drops to the next whole second
+                delay = left - math.ceil(left) + 1 if left > 0 else 0
+        if delay is None or delay > 0:
+            self.clock.wait(self.wake, delay)
+        return self.seconds_left()
+
+
+# Display values shared between the timer thread and the Tk thread
+class RenderState:
+    """Latest display values, written under a lock and applied only when changed"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}  # latest values published by the worker
+        self.applied = {}  # values already pushed to the widgets
+        self.alerts = []  # Alert entries waiting to be fired on the loop's thread
+
+    def update(self, **fields):
+        with self.lock:
+            self.values.update(fields)
+
+    def post_alert(self, alert):
+        with self.lock:
+            self.alerts.append(alert)
+
+    def take_changes(self):
+        """Return (changed fields, pending alerts) and mark them as applied"""
+        with self.lock:
+            changes = {
+                key: value for key, value in self.values.items()
+                if key not in self.applied or self.applied[key] != value
             }
-            with open(config_file, 'w') as f:
-                json.dump(config, f, indent=4)
-            SCHEDULED_HOUR = default_hour
-            SCHEDULED_MINUTE = default_minute
-            SCHEDULED_SECOND = default_second
-            
-    except Exception as e:
-        print(f"Error reading config: {e}")
-        SCHEDULED_HOUR = default_hour
-        SCHEDULED_MINUTE = default_minute
-        SCHEDULED_SECOND = default_second
-    
-    # Calculate activation time for today
-    today = datetime.datetime.now()
-    activation_time = datetime.datetime(
-        today.year, today.month, today.day,
-        SCHEDULED_HOUR, SCHEDULED_MINUTE, SCHEDULED_SECOND
-    )
-    
-    # If scheduled time has already passed today, schedule for tomorrow
-    if activation_time < today:
-        activation_time += datetime.timedelta(days=1)
-    
-    # Global variable to track PIN input
-    current_pin_input = ""
-    pin_window = None
-    
-    # Function to show PIN entry dialog
-    def show_pin_dialog():
-        nonlocal pin_window, current_pin_input, pin_attempts
-        
-        if pin_window and pin_window.winfo_exists():
-            pin_window.destroy()
-        
-        pin_window = tk.Toplevel(root)
-        pin_window.title("Enter PIN to Close")
-        pin_window.geometry("300x200")
-        pin_window.configure(bg='#2c3e50')
-        pin_window.attributes('-topmost', True)
-        pin_window.resizable(False, False)
-        pin_window.grab_set()
-        
-        # Center the window
-        pin_window.update_idletasks()
-        x = (root.winfo_screenwidth() - 300) // 2
-        y = (root.winfo_screenheight() - 200) // 2
-        pin_window.geometry(f"300x200+{x}+{y}")
-        
-        # Title
-        tk.Label(
-            pin_window,
-            text="ENTER PIN TO CLOSE",
-            font=('Arial', 14, 'bold'),
-            fg='white',
-            bg='#2c3e50'
-        ).pack(pady=10)
-        
-        # PIN display
-        pin_display = tk.Label(
-            pin_window,
-            text="",
-            font=('Arial', 24, 'bold'),
-            fg='white',
-            bg='#34495e',
-            width=10,
-            height=2
-        )
-        pin_display.pack(pady=10)
-        
-        # Status label
-        status_label = tk.Label(
-            pin_window,
-            text=f"Attempts remaining: {max_pin_attempts - pin_attempts}",
-            font=('Arial', 10),
-            fg='white',
-            bg='#2c3e50'
-        )
-        status_label.pack(pady=5)
-        
-        # Number pad frame
-        numpad_frame = tk.Frame(pin_window, bg='#2c3e50')
-        numpad_frame.pack(pady=10)
-        
-        # Function to handle number button click
-        def add_digit(digit):
-            nonlocal current_pin_input
-            if len(current_pin_input) < 4:
-                current_pin_input += str(digit)
-                pin_display.config(text="*" * len(current_pin_input))
-        
-        # Function to clear PIN
-        def clear_pin():
-            nonlocal current_pin_input
-            current_pin_input = ""
-            pin_display.config(text="")
-        
-        # Function to submit PIN
-        def submit_pin():
-            nonlocal current_pin_input, pin_attempts
-            if current_pin_input == pin_code:
-                # Correct PIN - close app
-                pin_window.destroy()
-                root.quit()
+            self.applied.update(changes)
+            alerts = self.alerts
+            self.alerts = []
+        return changes, alerts
+
+
+# Alerts keyed by remaining time, so pauses and extensions need no rescheduling
+class AlertScheduler:
+    """Fires alerts as the remaining time drops to them
+
+    Pending alerts sit in a heap with the largest remaining time on top, so a
+    tick only compares against one entry however many are configured. Fired
+    alerts go to a second heap (smallest on top) and are re-armed when an
+    extension lifts the remaining time back above them. A pause needs no
+    bookkeeping because nothing is keyed by wall-clock time. Alerts at or
+    above the session's starting length start out fired, so a short session
+    does not open with every longer warning at once.
+    """
+
+    def __init__(self, alerts, fired=(), start=None):
+        self.alerts = alerts
+        self.pending = []  # (-at, index, alert)
+        self.fired = []  # (at, index, alert)
+        for index, alert in enumerate(alerts):
+            if alert in fired or (start is not None and alert.at >= start):
+                self.fired.append((alert.at, index, alert))
             else:
-                # Wrong PIN
-                pin_attempts += 1
-                current_pin_input = ""
-                pin_display.config(text="")
-                
-                if pin_attempts >= max_pin_attempts:
-                    status_label.config(
-                        text="Too many attempts! App will continue.",
-                        fg='red'
-                    )
-                    pin_window.after(2000, pin_window.destroy)
-                else:
-                    status_label.config(
-                        text=f"Wrong PIN! Attempts remaining: {max_pin_attempts - pin_attempts}",
-                        fg='red'
-                    )
-                    pin_window.after(1000, lambda: status_label.config(
-                        text=f"Attempts remaining: {max_pin_attempts - pin_attempts}",
-                        fg='white'
-                    ))
-        
-        # Create number buttons (1-9)
-        buttons = []
-        for i in range(1, 10):
-            btn = tk.Button(
-                numpad_frame,
-                text=str(i),
-                font=('Arial', 12, 'bold'),
-                fg='white',
-                bg='#3498db',
-                width=3,
-                height=1,
-                command=lambda x=i: add_digit(x)
-            )
-            btn.grid(row=(i-1)//3, column=(i-1)%3, padx=2, pady=2)
-            buttons.append(btn)
-        
-        # Row for 0, Clear, and Submit
-        row_frame = tk.Frame(numpad_frame, bg='#2c3e50')
-        row_frame.grid(row=3, column=0, columnspan=3, pady=2)
-        
-        # 0 button
-        tk.Button(
-            row_frame,
-            text="0",
-            font=('Arial', 12, 'bold'),
-            fg='white',
-            bg='#3498db',
-            width=3,
-            height=1,
-            command=lambda: add_digit(0)
-        ).pack(side='left', padx=2)
-        
-        # Clear button
-        tk.Button(
-            row_frame,
-            text="C",
-            font=('Arial', 12, 'bold'),
-            fg='white',
-            bg='#e74c3c',
-            width=3,
-            height=1,
-            command=clear_pin
-        ).pack(side='left', padx=2)
-        
-        # Submit button
-        tk.Button(
-            row_frame,
-            text="✓",
-            font=('Arial', 12, 'bold'),
-            fg='white',
-            bg='#2ecc71',
-            width=3,
-            height=1,
-            command=submit_pin
-        ).pack(side='left', padx=2)
-        
-        # Bind keyboard events
-        def on_key_press(event):
-            if event.char.isdigit():
-                add_digit(event.char)
-            elif event.keysym == 'BackSpace':
-                clear_pin()
-            elif event.keysym == 'Return':
-                submit_pin()
-            elif event.keysym == 'Escape':
-                pin_window.destroy()
-        
-        pin_window.bind('<Key>', on_key_press)
-        pin_window.focus_set()
-    
-    # Function to handle Alt+F4 with PIN requirement
-    def handle_close(event=None):
-        show_pin_dialog()
-        return "break"  # Prevent default close action
-    
-    # Global hotkey for PIN entry (Ctrl+Shift+P)
-    def setup_global_hotkey():
+                self.pending.append((-alert.at, index, alert))
+        heapq.heapify(self.pending)
+        heapq.heapify(self.fired)
+
+    def due(self, remaining):
+        """Alerts to fire now that `remaining` seconds are left, largest first"""
+        while self.fired and self.fired[0][0] < remaining:
+            at, index, alert = heapq.heappop(self.fired)
+            heapq.heappush(self.pending, (-at, index, alert))
+        due = []
+        while self.pending and -self.pending[0][0] >= remaining:
+            neg_at, index, alert = heapq.heappop(self.pending)
+            heapq.heappush(self.fired, (-neg_at, index, alert))
+            due.append(alert)
+        return due
+
+    def end_early(self):
+        """Alerts to fire when the session is stopped early: only those at zero"""
+        due = [alert for _, _, alert in sorted(self.pending) if alert.at == 0]
+        for neg_at, index, alert in self.pending:
+            heapq.heappush(self.fired, (-neg_at, index, alert))
+        self.pending = []
+        return due
+
+    def rebuild(self, alerts):
+        """Scheduler for new alerts after a config reload; alerts already fired stay fired"""
+        return AlertScheduler(alerts, {alert for _, _, alert in self.fired})
+
+
+# Instrumentation: histograms and gauges, exported as JSON and Prometheus text
+class Histogram:
+    """Bucketed distribution of non-negative values"""
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class Metrics:
+    """Thread-safe registry of labelled histograms and gauges"""
+    enabled = True
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (name, label) -> Histogram
+        self.gauges = {}  # (name, label) -> value
+
+    def observe(self, name, value, label=''):
+        with self.lock:
+            histogram = self.histograms.get((name, label))
+            if histogram is None:
+                histogram = self.histograms[(name, label)] = Histogram()
+            histogram.observe(value)
+
+    def set_gauge(self, name, value, label=''):
+        with self.lock:
+            self.gauges[(name, label)] = value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'time': time.time(),
+                'histograms': [
+                    {
+                        'name': name, 'label': label, 'count': histogram.count,
+                        'sum': histogram.sum, 'max': histogram.max,
+                        'buckets': [[str(bound), count] for bound, count in histogram.cumulative()],
+                    }
+                    for (name, label), histogram in sorted(self.histograms.items())
+                ],
+                'gauges': [
+                    {'name': name, 'label': label, 'value': value}
+                    for (name, label), value in sorted(self.gauges.items())
+                ],
+            }
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for (name, label), histogram in sorted(self.histograms.items()):
+                labels = f'screen="{label}",' if label else ''
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f'promo_{name}_bucket{{{labels}le="{le}"}} {count}')
+                suffix = f'{{{labels[:-1]}}}' if label else ''
+                lines.append(f'promo_{name}_sum{suffix} {histogram.sum}')
+                lines.append(f'promo_{name}_count{suffix} {histogram.count}')
+            for (name, label), value in sorted(self.gauges.items()):
+                suffix = f'{{screen="{label}"}}' if label else ''
+                lines.append(f'promo_{name}{suffix} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path):
+        # Write then rename so readers never see a half-written file
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(temp_path, path)
+
+
+class NullMetrics:
+    """Stand-in when instrumentation is off; call sites check .enabled first"""
+    enabled = False
+
+    def observe(self, name, value, label=''):
+        pass
+
+    def set_gauge(self, name, value, label=''):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def start_metrics_server(metrics, port):
+    """Serve metrics.prometheus_text() on http://127.0.0.1:port/metrics from a daemon thread"""
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep the console for the app's own messages
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Debug watchdog: profiles the main thread whenever the mainloop stops beating
+class StallDetector:
+    """Samples the Tk thread's stack while its heartbeat is overdue and logs where it was"""
+
+    def __init__(self, root, threshold_ms, path, metrics=NULL_METRICS):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.path = path
+        self.metrics = metrics
+        self.main_id = threading.get_ident()  # created on the Tk thread
+        self.last_beat = time.monotonic()
+        self.beat_id = None
+        self.stop_event = threading.Event()
+        self.logger = None
+        self.stalls = 0
+
+    def start(self):
+        # Only imported in debug mode
+        import logging
+        import logging.handlers
+        self.logger = logging.getLogger('promo.stalls')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        handler = logging.handlers.RotatingFileHandler(
+            self.path, maxBytes=STALL_LOG_MAX_BYTES, backupCount=STALL_LOG_BACKUPS)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self.logger.addHandler(handler)
+        self.beat()
+        threading.Thread(target=self.watch, daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.beat_id is not None:
+            self.root.after_cancel(self.beat_id)
+            self.beat_id = None
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+        self.beat_id = self.root.after(STALL_HEARTBEAT_MS, self.beat)
+
+    def overdue(self):
+        """Seconds the heartbeat is late, or 0 while the mainloop is responsive"""
+        late = time.monotonic() - self.last_beat - STALL_HEARTBEAT_MS / 1000
+        return late if late > self.threshold else 0
+
+    def watch(self):
+        while not self.stop_event.wait(STALL_SAMPLE_MS / 1000):
+            if self.overdue():
+                self.profile()
+
+    def main_frame(self):
+        return sys._current_frames().get(self.main_id)
+
+    def profile(self):
+        """Sample the stalled thread until its heartbeat returns, then write one report"""
+        import traceback
+        stalled_beat = self.last_beat
+        frame = self.main_frame()
+        if frame is None:
+            return
+        stack = traceback.format_stack(frame)
+        counts = collections.Counter()  # (file, line, function) -> samples with it on the stack
+        samples = 0
+        while self.last_beat == stalled_beat and samples < STALL_MAX_SAMPLES:
+            frame = self.main_frame()
+            if frame is None:
+                break
+            samples += 1
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = (os.path.basename(code.co_filename), frame.f_lineno, code.co_name)
+                if key not in seen:
+                    seen.add(key)
+                    counts[key] += 1
+                frame = frame.f_back
+            if self.stop_event.wait(STALL_SAMPLE_MS / 1000):
+                break
+        duration = time.monotonic() - stalled_beat - STALL_HEARTBEAT_MS / 1000
+        self.stalls += 1
+        self.metrics.observe('stall_seconds', duration)
+        lines = [f"Mainloop stalled for {duration * 1000:.0f} ms ({samples} samples every {STALL_SAMPLE_MS} ms)",
+                 "Main thread stack when detected:"]
+        lines.extend(entry.rstrip() for entry in stack)
+        lines.append("Sampled frames (share of samples on the stack):")
+        for (filename, lineno, name), count in counts.most_common(15):
+            lines.append(f"  {count * 100 // max(samples, 1):3d}%  {name} ({filename}:{lineno})")
+        self.logger.info("\n".join(lines))
+        print(f"Stall: mainloop blocked {duration * 1000:.0f} ms, details in {self.path}")
+
+
+# One wall-clock aligned scheduler shared by every screen
+class TickDriver:
+    """Wakes on wall-clock second boundaries only when a subscriber is due"""
+
+    def __init__(self, root, now=time.time, metrics=NULL_METRICS):
+        self.root = root
+        self.now = now
+        self.metrics = metrics
+        self.label = ''  # current screen, for per-screen lateness metrics
+        self.subscribers = {}  # token -> [callback(datetime), interval, next_due]
+        self.next_token = 0
+        self.after_id = None
+        self.scheduled_for = None  # timestamp the pending after() targets
+        self.wakeups = 0
+
+    def subscribe(self, callback, interval=1):
+        """Run callback(now) every `interval` seconds, aligned to the wall clock"""
+        token = self.next_token
+        self.next_token += 1
+        self.subscribers[token] = [callback, interval, self.next_boundary(interval)]
+        self.schedule()
+        return token
+
+    def call_at(self, timestamp, callback):
+        """Run callback(now) once at the given wall-clock timestamp"""
+        token = self.next_token
+        self.next_token += 1
+        self.subscribers[token] = [callback, None, timestamp]
+        self.schedule()
+        return token
+
+    def set_interval(self, token, interval):
+        entry = self.subscribers.get(token)
+        if entry is not None and entry[1] != interval:
+            entry[1] = interval
+            entry[2] = self.next_boundary(interval)
+            self.schedule()
+
+    def unsubscribe(self, token):
+        self.subscribers.pop(token, None)
+        if not self.subscribers:
+            self.cancel()
+
+    def next_boundary(self, interval):
+        return (math.floor(self.now() / interval) + 1) * interval
+
+    def cancel(self):
+        if self.after_id is not None:
+            self.root.after_cancel(self.after_id)
+            self.after_id = None
+            self.scheduled_for = None
+
+    def schedule(self):
+        if not self.subscribers:
+            return
+        due = min(entry[2] for entry in self.subscribers.values())
+        if self.after_id is not None and self.scheduled_for <= due:
+            return  # already waking up early enough
+        self.cancel()
+        delay = max(0, math.ceil((due - self.now()) * 1000)) + TICK_PHASE_MS
+        self.scheduled_for = due
+        self.after_id = self.root.after(delay, self.tick)
+
+    def tick(self):
+        timestamp = self.now()
+        if self.metrics.enabled and self.scheduled_for is not None:
+            lateness = timestamp - self.scheduled_for - TICK_PHASE_MS / 1000
+            self.metrics.observe('tick_lateness_seconds', max(0.0, lateness), self.label)
+        self.after_id = None
+        self.scheduled_for = None
+        self.wakeups += 1
+        now = datetime.datetime.fromtimestamp(timestamp)
+        for token, entry in list(self.subscribers.items()):
+            # A previous callback may have unsubscribed this one
+            if token not in self.subscribers or entry[2] > timestamp:
+                continue
+            callback, interval = entry[0], entry[1]
+            if interval is None:
+                del self.subscribers[token]
+            else:
+                entry[2] = self.next_boundary(interval)
+            callback(now)
+        self.schedule()
+
+
+# Validated, immutable configuration read from timer_config.json
+class ConfigError(ValueError):
+    pass
+
+
+DEFAULT_COLORS = {
+    'timer': 'red',  # countdown digits before the first warning
+    'warning': 'orange',  # countdown and status text after the warning threshold
+    'urgent': 'red',  # countdown and status text after the urgent threshold
+    'warning_popup': '#FF9900',
+    'urgent_popup': '#FF4444',
+}
+
+
+# Every setting with its default; namedtuples keep the config immutable without
+# importing dataclasses (and inspect) on the startup path
+CONFIG_DEFAULTS = (
+    ('hour', 13),  # 1 PM
+    ('minute', 30),
+    ('second', 0),
+    ('pin', "1234"),  # PIN to close app
+    ('max_pin_attempts', 3),
+    ('session_duration', 3540),  # 59 minutes for countdown
+    ('warning_seconds', 300),  # 5 minute warning
+    ('urgent_seconds', 60),  # 1 minute warning
+    ('shutdown_delay', 10),  # seconds shown on the TIME'S UP screen
+    ('popup_duration', 5000),  # milliseconds a countdown popup stays visible
+    ('windows', ()),  # PromoWindow entries; empty means one daily window at hour:minute:second
+    ('closed_dates', frozenset()),  # dates with no promo at all
+    ('timezone', ""),  # IANA zone for the schedule, empty for the system zone
+    ('persistent', False),  # return to the waiting screen after a session instead of shutting down
+    ('hotkey_backend', 'auto'),  # auto, keyboard (global OS hook) or tk (window bindings only)
+    ('render_backend', 'tk'),  # tk (fullscreen kiosk), curses (text terminal) or null (draws nothing)
+    ('countdown_widget', 'label'),  # label, or canvas to swap cached digit glyphs each tick (Tk only)
+    ('metrics', False),  # record tick jitter, mainloop lag and popup timings
+    ('metrics_file', "promo_metrics.json"),  # JSON snapshot written while metrics are on
+    ('metrics_port', 9464),  # localhost Prometheus endpoint, 0 to disable
+    ('stall_threshold_ms', 0),  # log a profile when the mainloop blocks this long, 0 to disable
+    ('stall_log', "promo_stalls.log"),  # rotating file for stall reports
+    ('alerts', ()),  # Alert entries for the countdown; empty for the warning and urgent popups
+    ('alert_dry_run', False),  # print alert commands instead of running them
+    ('pre_shutdown_hooks', ()),  # ShutdownHook steps run in parallel before shutting down
+    ('pre_shutdown_deadline', 60),  # seconds before every unfinished hook is killed
+    ('shutdown_command', ""),  # empty for the platform default in SHUTDOWN_COMMANDS
+    ('shutdown_dry_run', False),  # print the shutdown command instead of running it
+    ('analytics_db', "promo_analytics.db"),  # SQLite session analytics, empty to disable
+    ('control_socket', ""),  # UNIX socket for status/pause/resume/extend/start/stop, empty to disable
+    ('fleet_controller', ""),  # host or host:port of fleet.py, empty to run standalone
+    ('station_id', ""),  # name reported to the fleet controller, empty for the host name
+    ('fleet_token', ""),  # station secret (fleet.py --token); fleet commands need the separate admin token
+    ('colors', types.MappingProxyType(dict(DEFAULT_COLORS))),
+)
+
+
+class PromoConfig(collections.namedtuple(
+        'PromoConfig', [name for name, _ in CONFIG_DEFAULTS],
+        defaults=[value for _, value in CONFIG_DEFAULTS])):
+    __slots__ = ()
+
+    def to_dict(self):
+        data = self._asdict()
+        data['colors'] = dict(self.colors)
+        data['windows'] = [window.to_dict() for window in self.windows]
+        data['alerts'] = [alert.to_dict() for alert in self.alerts]
+        data['pre_shutdown_hooks'] = [hook.to_dict() for hook in self.pre_shutdown_hooks]
+        data['closed_dates'] = sorted(date.isoformat() for date in self.closed_dates)
+        return data
+
+
+WEEKDAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+WEEKDAY_GROUPS = {
+    'daily': range(7),
+    'weekdays': range(5),
+    'weekends': range(5, 7),
+}
+DAY_SECONDS = 24 * 3600
+WEEK_SECONDS = 7 * DAY_SECONDS
+
+
+# A recurring promo slot on some weekdays:
+#   start         seconds after midnight
+#   end           seconds after midnight of the start day; past DAY_SECONDS crosses midnight
+#   weekdays      0 = Monday
+#   except_dates  dates this window is skipped
+class PromoWindow(collections.namedtuple(
+        'PromoWindow', ['start', 'end', 'weekdays', 'except_dates'],
+        defaults=[frozenset(range(7)), frozenset()])):
+    __slots__ = ()
+
+    def to_dict(self):
+        return {
+            'days': [WEEKDAY_NAMES[day] for day in sorted(self.weekdays)],
+            'start': format_time_of_day(self.start),
+            'end': format_time_of_day(self.end % DAY_SECONDS),
+            'except': sorted(date.isoformat() for date in self.except_dates),
+        }
+
+
+def format_time_of_day(seconds):
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours:02d}:{rest // 60:02d}:{rest % 60:02d}"
+
+
+def parse_time_of_day(value, key):
+    """Parse 'HH:MM' or 'HH:MM:SS' into seconds after midnight"""
+    parts = str(value).split(':')
+    try:
+        numbers = [int(part) for part in parts]
+    except ValueError:
+        numbers = []
+    if len(numbers) == 2:
+        numbers.append(0)
+    if len(numbers) != 3 or not (0 <= numbers[0] <= 23 and 0 <= numbers[1] <= 59 and 0 <= numbers[2] <= 59):
+        raise ConfigError(f"{key} must be a time like 13:30 or 13:30:00")
+    return numbers[0] * 3600 + numbers[1] * 60 + numbers[2]
+
+
+def parse_weekdays(value):
+    """Parse 'daily', 'weekdays', 'weekends', 'mon-fri' or a list of day names"""
+    if isinstance(value, str):
+        value = value.lower()
+        if value in WEEKDAY_GROUPS:
+            return frozenset(WEEKDAY_GROUPS[value])
+        if '-' in value:
+            first, _, last = value.partition('-')
+            if first in WEEKDAY_NAMES and last in WEEKDAY_NAMES:
+                first, last = WEEKDAY_NAMES.index(first), WEEKDAY_NAMES.index(last)
+                return frozenset(day % 7 for day in range(first, last + 1 if last >= first else last + 8))
+        value = [value]
+    if not isinstance(value, list) or not value:
+        raise ConfigError("window days must be a day group or a list of day names")
+    days = set()
+    for name in value:
+        name = str(name).lower()
+        if name not in WEEKDAY_NAMES:
+            raise ConfigError(f"unknown day: {name}")
+        days.add(WEEKDAY_NAMES.index(name))
+    return frozenset(days)
+
+
+def parse_dates(value, key):
+    if not isinstance(value, list):
+        raise ConfigError(f"{key} must be a list of YYYY-MM-DD dates")
+    try:
+        return frozenset(datetime.date.fromisoformat(str(item)) for item in value)
+    except ValueError:
+        raise ConfigError(f"{key} must be a list of YYYY-MM-DD dates")
+
+
+def parse_window(data):
+    if not isinstance(data, dict):
+        raise ConfigError("each window must be a JSON object")
+    if 'start' not in data or 'end' not in data:
+        raise ConfigError("each window needs a start and an end")
+    start = parse_time_of_day(data['start'], 'window start')
+    end = parse_time_of_day(data['end'], 'window end')
+    if end <= start:
+        end += DAY_SECONDS  # window crosses midnight
+    return PromoWindow(
+        start=start,
+        end=end,
+        weekdays=parse_weekdays(data.get('days', 'daily')),
+        except_dates=parse_dates(data.get('except', []), 'window except'),
+    )
+
+
+# A pre-shutdown step: command is a shell string or an argv list
+class ShutdownHook(collections.namedtuple(
+        'ShutdownHook', ['name', 'command', 'timeout'], defaults=[HOOK_DEFAULT_TIMEOUT])):
+    __slots__ = ()
+
+    def to_dict(self):
+        command = self.command if isinstance(self.command, str) else list(self.command)
+        return {'name': self.name, 'command': command, 'timeout': self.timeout}
+
+
+def parse_hook(data):
+    if not isinstance(data, dict):
+        raise ConfigError("each pre_shutdown_hooks entry must be a JSON object")
+    command = data.get('command')
+    if isinstance(command, list) and command and all(isinstance(arg, str) for arg in command):
+        command = tuple(command)
+    elif not isinstance(command, str) or not command:
+        raise ConfigError("each pre-shutdown hook needs a command string or list of strings")
+    name = data.get('name', command if isinstance(command, str) else command[0])
+    if not isinstance(name, str):
+        raise ConfigError("pre-shutdown hook name must be a string")
+    timeout = data.get('timeout', HOOK_DEFAULT_TIMEOUT)
+    if isinstance(timeout, bool) or not isinstance(timeout, int) or not 1 <= timeout <= 3600:
+        raise ConfigError("pre-shutdown hook timeout must be an integer between 1 and 3600")
+    return ShutdownHook(name=name, command=command, timeout=timeout)
+
+
+# A session alert fired when the remaining time drops to `at` seconds:
+#   message  popup text, shown in color (empty for the warning popup colour)
+#   bell     ring the terminal or window bell
+#   command  shell string or argument list started without waiting (e.g. a sound or a logout script)
+class Alert(collections.namedtuple(
+        'Alert', ['at', 'message', 'color', 'bell', 'command'], defaults=["", "", False, ""])):
+    __slots__ = ()
+
+    def to_dict(self):
+        command = self.command if isinstance(self.command, str) else list(self.command)
+        return {'at': self.at, 'message': self.message, 'color': self.color, 'bell': self.bell, 'command': command}
+
+
+def parse_alert(data):
+    if not isinstance(data, dict):
+        raise ConfigError("each alerts entry must be a JSON object")
+    at = data.get('at')
+    if isinstance(at, bool) or not isinstance(at, int) or not 0 <= at <= 24 * 3600:
+        raise ConfigError("alert 'at' must be the remaining seconds, between 0 and 86400")
+    message = data.get('message', "")
+    color = data.get('color', "")
+    if not isinstance(message, str) or not isinstance(color, str):
+        raise ConfigError("alert message and color must be strings")
+    bell = data.get('bell', False)
+    if not isinstance(bell, bool):
+        raise ConfigError("alert bell must be true or false")
+    command = data.get('command', "")
+    if isinstance(command, list) and command and all(isinstance(arg, str) for arg in command):
+        command = tuple(command)
+    elif not isinstance(command, str):
+        raise ConfigError("alert command must be a string or list of strings")
+    if not (message or bell or command):
+        raise ConfigError("each alert needs a message, bell or command")
+    return Alert(at=at, message=message, color=color, bell=bell, command=command)
+
+
+def session_alerts(config):
+    """The configured alerts, or the classic warning and urgent popups"""
+    if config.alerts:
+        return config.alerts
+    return (
+        Alert(config.warning_seconds,
+              f"{describe_minutes(config.warning_seconds).upper()} LEFT!\nTime is running out",
+              config.colors['warning_popup']),
+        Alert(config.urgent_seconds,
+              f"PLEASE LOGOUT YOUR ACCOUNTS NOW!\n{describe_minutes(config.urgent_seconds).upper()} LEFT!",
+              config.colors['urgent_popup']),
+    )
+
+
+def popup_thresholds(alerts):
+    """Remaining seconds of the popup alerts above zero, smallest first"""
+    return sorted({alert.at for alert in alerts if alert.message and alert.at > 0})
+
+
+def describe_popups(thresholds, duration):
+    """Countdown-screen note listing when the popups of a session appear"""
+    times = [describe_minutes(at) for at in reversed(thresholds) if at < duration]
+    if not times:
+        return "No notifications during this session"
+    if len(times) == 1:
+        return f"A notification will appear at {times[0]}"
+    return f"Notifications will appear at {', '.join(times[:-1])} and {times[-1]}"
+
+
+# (key, minimum, maximum) for every integer setting
+CONFIG_INT_FIELDS = (
+    ('hour', 0, 23),
+    ('minute', 0, 59),
+    ('second', 0, 59),
+    ('max_pin_attempts', 1, 100),
+    ('session_duration', 1, 24 * 3600),
+    ('warning_seconds', 0, 24 * 3600),
+    ('urgent_seconds', 0, 24 * 3600),
+    ('shutdown_delay', 0, 3600),
+    ('popup_duration', 100, 600000),
+    ('metrics_port', 0, 65535),
+    ('stall_threshold_ms', 0, 60000),
+    ('pre_shutdown_deadline', 1, 3600),
+)
+
+CONFIG_BOOL_FIELDS = ('persistent', 'metrics', 'alert_dry_run', 'shutdown_dry_run')
+
+
+def load_timezone(name):
+    """ZoneInfo for an IANA name, or None for the system zone"""
+    if not name:
+        return None
+    try:
+        import zoneinfo
+        return zoneinfo.ZoneInfo(name)
+    except (ImportError, ValueError, KeyError) as e:
+        # KeyError is ZoneInfoNotFoundError (e.g. no tzdata on Windows)
+        raise ConfigError(f"unknown timezone {name}: {e}")
+
+
+def parse_config(data):
+    """Validate a decoded timer_config.json and return a PromoConfig"""
+    if not isinstance(data, dict):
+        raise ConfigError("config must be a JSON object")
+    values = {}
+    for key, minimum, maximum in CONFIG_INT_FIELDS:
+        if key not in data:
+            continue
+        value = data[key]
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ConfigError(f"{key} must be an integer")
+        if not minimum <= value <= maximum:
+            raise ConfigError(f"{key} must be between {minimum} and {maximum}")
+        values[key] = value
+    if 'pin' in data:
+        pin = str(data['pin'])
+        if not pin.isdigit() or not 1 <= len(pin) <= 4:
+            raise ConfigError("pin must be 1-4 digits")
+        values['pin'] = pin
+    colors = dict(DEFAULT_COLORS)
+    if 'colors' in data:
+        if not isinstance(data['colors'], dict):
+            raise ConfigError("colors must be a JSON object")
+        for key, value in data['colors'].items():
+            if key not in DEFAULT_COLORS:
+                raise ConfigError(f"unknown color: {key}")
+            if not isinstance(value, str) or not value:
+                raise ConfigError(f"color {key} must be a string")
+            colors[key] = value
+    values['colors'] = types.MappingProxyType(colors)
+    if 'windows' in data:
+        if not isinstance(data['windows'], list):
+            raise ConfigError("windows must be a list")
+        values['windows'] = tuple(parse_window(window) for window in data['windows'])
+    if 'alerts' in data:
+        if not isinstance(data['alerts'], list):
+            raise ConfigError("alerts must be a list")
+        values['alerts'] = tuple(parse_alert(alert) for alert in data['alerts'])
+    if 'pre_shutdown_hooks' in data:
+        if not isinstance(data['pre_shutdown_hooks'], list):
+            raise ConfigError("pre_shutdown_hooks must be a list")
+        values['pre_shutdown_hooks'] = tuple(parse_hook(hook) for hook in data['pre_shutdown_hooks'])
+    if 'analytics_db' in data:
+        if not isinstance(data['analytics_db'], str):
+            raise ConfigError("analytics_db must be a file name, or empty to disable analytics")
+        values['analytics_db'] = data['analytics_db']
+    if 'control_socket' in data:
+        if not isinstance(data['control_socket'], str):
+            raise ConfigError("control_socket must be a path, or empty to disable it")
+        values['control_socket'] = data['control_socket']
+    for key in ('fleet_controller', 'station_id', 'fleet_token'):
+        if key in data:
+            if not isinstance(data[key], str):
+                raise ConfigError(f"{key} must be a string")
+            values[key] = data[key]
+    if values.get('fleet_controller'):
+        parse_address(values['fleet_controller'])
+    if 'shutdown_command' in data:
+        if not isinstance(data['shutdown_command'], str):
+            raise ConfigError("shutdown_command must be a string")
+        values['shutdown_command'] = data['shutdown_command']
+    if 'closed_dates' in data:
+        values['closed_dates'] = parse_dates(data['closed_dates'], 'closed_dates')
+    if 'timezone' in data:
+        if not isinstance(data['timezone'], str):
+            raise ConfigError("timezone must be a string")
+        if data['timezone']:
+            load_timezone(data['timezone'])
+        values['timezone'] = data['timezone']
+    if 'hotkey_backend' in data:
+        if data['hotkey_backend'] not in HOTKEY_BACKENDS:
+            raise ConfigError(f"hotkey_backend must be one of: {', '.join(HOTKEY_BACKENDS)}")
+        values['hotkey_backend'] = data['hotkey_backend']
+    if 'render_backend' in data:
+        if data['render_backend'] not in RENDER_BACKENDS:
+            raise ConfigError(f"render_backend must be one of: {', '.join(RENDER_BACKENDS)}")
+        values['render_backend'] = data['render_backend']
+    if 'countdown_widget' in data:
+        if data['countdown_widget'] not in COUNTDOWN_WIDGETS:
+            raise ConfigError(f"countdown_widget must be one of: {', '.join(COUNTDOWN_WIDGETS)}")
+        values['countdown_widget'] = data['countdown_widget']
+    for key in CONFIG_BOOL_FIELDS:
+        if key in data:
+            if not isinstance(data[key], bool):
+                raise ConfigError(f"{key} must be true or false")
+            values[key] = data[key]
+    for key in ('metrics_file', 'stall_log'):
+        if key in data:
+            if not isinstance(data[key], str) or not data[key]:
+                raise ConfigError(f"{key} must be a file name")
+            values[key] = data[key]
+    config = PromoConfig(**values)
+    if config.urgent_seconds > config.warning_seconds:
+        raise ConfigError("urgent_seconds must not exceed warning_seconds")
+    return config
+
+
+def parse_address(value, default_port=FLEET_PORT):
+    """(host, port) from 'host' or 'host:port'"""
+    host, _, port = value.rpartition(':') if ':' in value else (value, '', '')
+    try:
+        port = int(port) if port else default_port
+    except ValueError:
+        port = -1
+    if not host or not 0 < port < 65536:
+        raise ConfigError(f"invalid address {value!r}, expected host or host:port")
+    return host, port
+
+
+def merge_config_file(path, updates):
+    """Apply pushed settings to the config file, validating before replacing it"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    except ValueError as e:
+        raise ConfigError(f"invalid JSON: {e}")
+    data.update(updates)
+    parse_config(data)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(temp_path, path)
+
+
+def load_config(path):
+    """Read and validate the config file, creating it with defaults if missing"""
+    if not os.path.exists(path):
+        config = PromoConfig()
+        data = config.to_dict()
+        data['note'] = 'Schedule time in 24-hour format. hour: 0-23, minute: 0-59, second: 0-59'
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=4)
+        return config
+    with open(path, 'r') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ConfigError(f"invalid JSON: {e}")
+    return parse_config(data)
+
+
+class ConfigWatcher:
+    """Caches the parsed config and reloads it when the file's mtime changes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = self.stat_mtime()
+        try:
+            self.config = load_config(path)
+        except (OSError, ConfigError) as e:
+            print(f"Error reading config: {e}")
+            self.config = PromoConfig()
+        if self.mtime is None:
+            self.mtime = self.stat_mtime()
+
+    def stat_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self):
+        """Return the new config if the file changed and is valid, else None"""
+        mtime = self.stat_mtime()
+        if mtime is None or mtime == self.mtime:
+            return None
+        self.mtime = mtime
+        try:
+            config = load_config(self.path)
+        except (OSError, ConfigError) as e:
+            print(f"Error reading config, keeping previous settings: {e}")
+            return None
+        if config == self.config:
+            return None
+        self.config = config
+        return config
+
+
+def describe_minutes(seconds):
+    """'5 minutes' / '1 minute' style text for a threshold"""
+    minutes = max(1, round(seconds / 60))
+    return f"{minutes} minute" if minutes == 1 else f"{minutes} minutes"
+
+
+# Sorted weekly index of promo windows
+class Schedule:
+    """Answers "next activation" and "which window is open" with bisect lookups
+
+    Windows are indexed in local wall-clock time of the schedule's zone; results
+    are timezone-aware, so timestamps stay correct across DST changes.
+    """
+
+    def __init__(self, windows, closed_dates=frozenset(), tz=None, clock=SYSTEM_CLOCK):
+        self.closed_dates = closed_dates
+        self.tz = tz  # None means the system zone
+        self.clock = clock
+        entries = []
+        for window in windows:
+            for weekday in window.weekdays:
+                offset = weekday * DAY_SECONDS + window.start
+                entries.append((offset, offset + window.end - window.start, window))
+        entries.sort(key=lambda entry: entry[:2])
+        self.starts = [entry[0] for entry in entries]  # seconds after Monday 00:00
+        self.ends = [entry[1] for entry in entries]
+        self.windows = [entry[2] for entry in entries]
+        # Latest end among entries[:i + 1], to stop the open-window scan early
+        self.max_ends = []
+        latest = 0
+        for end in self.ends:
+            latest = max(latest, end)
+            self.max_ends.append(latest)
+
+    def now(self):
+        """Current aware time in the schedule's zone"""
+        timestamp = self.clock.time()
+        if self.tz:
+            return datetime.datetime.fromtimestamp(timestamp, self.tz)
+        return datetime.datetime.fromtimestamp(timestamp).astimezone()
+
+    def to_wall(self, now):
+        """Naive local wall-clock time for an aware or naive datetime"""
+        if now.tzinfo is None:
+            return now
+        return (now.astimezone(self.tz) if self.tz else now.astimezone()).replace(tzinfo=None)
+
+    def from_wall(self, wall):
+        """Aware datetime for a local wall-clock time (first one if ambiguous)"""
+        return wall.replace(tzinfo=self.tz) if self.tz else wall.astimezone()
+
+    def week_start(self, now):
+        """Monday 00:00 of the week containing now (wall-clock)"""
+        return datetime.datetime.combine(now.date() - datetime.timedelta(days=now.weekday()), datetime.time())
+
+    def occurrence(self, week_start, week, index):
+        # Wall-clock arithmetic: 13:30 stays 13:30 on both sides of a DST change
+        start = week_start + datetime.timedelta(weeks=week, seconds=self.starts[index])
+        end = start + datetime.timedelta(seconds=self.ends[index] - self.starts[index])
+        return self.from_wall(start), self.from_wall(end)
+
+    def is_skipped(self, index, start):
+        day = self.to_wall(start).date()
+        return day in self.closed_dates or day in self.windows[index].except_dates
+
+    def current_window(self, now):
+        """(start, end) of a window open at now, or None"""
+        now = self.to_wall(now)
+        week_start = self.week_start(now)
+        offset = (now - week_start).total_seconds()
+        # Windows from last week (e.g. Sunday night) may still be open on Monday
+        for week, position in ((0, offset), (-1, offset + WEEK_SECONDS)):
+            index = bisect.bisect_right(self.starts, position) - 1
+            while index >= 0 and self.max_ends[index] > position:
+                if self.ends[index] > position:
+                    start, end = self.occurrence(week_start, week, index)
+                    if not self.is_skipped(index, start):
+                        return start, end
+                index -= 1
+        return None
+
+    def next_activation(self, now):
+        """Start of the first window strictly after now, or None"""
+        if not self.starts:
+            return None
+        now = self.to_wall(now)
+        week_start = self.week_start(now)
+        offset = (now - week_start).total_seconds()
+        first = bisect.bisect_right(self.starts, offset)
+        count = len(self.starts)
+        # Skip over excluded dates for at most a year
+        for step in range(count * 53):
+            week, index = divmod(first + step, count)
+            start, end = self.occurrence(week_start, week, index)
+            if not self.is_skipped(index, start):
+                return start
+        return None
+
+
+def build_schedule(config, clock=SYSTEM_CLOCK):
+    """Schedule for the config, with the legacy hour/minute/second as one daily window"""
+    windows = config.windows
+    if not windows:
+        start = config.hour * 3600 + config.minute * 60 + config.second
+        windows = (PromoWindow(start=start, end=start + config.session_duration),)
+    return Schedule(windows, config.closed_dates, load_timezone(config.timezone), clock)
+
+
+# Append-only journal of the running session, replayed after a crash or reboot
+class SessionJournal:
+    """JSON-lines journal of session start, ticks, extensions and end"""
+
+    def __init__(self, path, fsync_interval=JOURNAL_FSYNC_INTERVAL, clock=time.monotonic):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        self.file = None
+        self.pending = []  # encoded records not yet written
+        self.last_sync = 0.0
+        self.lock = threading.Lock()
+
+    def start(self, remaining):
+        """Begin a new session journal, replacing the previous one"""
+        if not self.path:
+            return  # journal disabled
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            self.pending = []
+            try:
+                self.file = open(self.path, 'w', encoding='utf-8')
+            except OSError as e:
+                # The countdown still runs to the end; it just cannot be resumed
+                print(f"Session journal disabled, cannot open {self.path}: {e}")
+                self.path = None
+                return
+        self.record('start', remaining, sync=True)
+
+    def record(self, event, remaining, sync=False, **fields):
+        """Queue a record; ticks are flushed at most every fsync_interval seconds"""
+        entry = {'event': event, 'remaining': remaining, 'time': time.time()}
+        entry.update(fields)
+        with self.lock:
+            if self.file is None:
+                return
+            self.pending.append(json.dumps(entry) + "\n")
+            if sync or self.clock() - self.last_sync >= self.fsync_interval:
+                self.flush_locked()
+
+    def extend(self, seconds, remaining):
+        self.record('extend', remaining, sync=True, seconds=seconds)
+
+    def alert(self, alert, remaining):
+        # Synced before the alert's command runs, so a resumed session does not run it again
+        self.record('alert', remaining, sync=True, alert=alert.to_dict())
+
+    def end(self, reason):
+        self.record('end', 0, sync=True, reason=reason)
+        self.close()
+
+    def flush_locked(self):
+        try:
+            self.file.writelines(self.pending)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except OSError as e:
+            print(f"Error writing session journal: {e}")
+        self.pending = []
+        self.last_sync = self.clock()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                if self.pending:
+                    self.flush_locked()
+                self.file.close()
+                self.file = None
+
+    @staticmethod
+    def replay(path):
+        """(remaining seconds, alerts already fired) of an unfinished session in the journal, or None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        last = None
+        fired = set()
+        for line in lines:
+            try:
+                last = json.loads(line)
+            except ValueError:
+                continue  # torn write at the end of the file
+            if isinstance(last, dict) and last.get('event') == 'alert':
+                try:
+                    fired.add(parse_alert(last.get('alert')))
+                except ConfigError:
+                    pass  # an alert from an older config format; it may fire again
+        if not isinstance(last, dict) or last.get('event') == 'end':
+            return None
+        remaining = int(last.get('remaining', 0))
+        return (remaining, fired) if remaining > 0 else None
+
+
+# Session lifecycle analytics in SQLite; the Tk thread only ever touches a queue
+ANALYTICS_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS events (
+        time REAL NOT NULL,      -- unix time
+        day TEXT NOT NULL,       -- schedule-local YYYY-MM-DD
+        slot TEXT NOT NULL,      -- start of the promo window (HH:MM), or 'manual'
+        event TEXT NOT NULL,     -- session_start, session_resume, session_end, pin_failure, promo_missed
+        session INTEGER,         -- unix time the session started
+        reason TEXT,             -- session_end: time_up or pin
+        value REAL               -- session_start: planned seconds, session_end: seconds used
+    )""",
+    "CREATE INDEX IF NOT EXISTS events_by_event_day ON events (event, day, slot)",
+)
+
+
+class AnalyticsStore:
+    """Queues lifecycle events and writes them in batches from a background thread"""
+
+    def __init__(self, path, now=datetime.datetime.now):
+        self.path = path
+        self.now = now  # aware time in the schedule's zone
+        self.events = queue.SimpleQueue()
+        self.thread = None
+        self.session = None  # (session id, slot) while a countdown runs
+        self.enabled = True
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def record(self, event, slot, session=None, reason=None, value=None):
+        if not self.enabled:
+            return
+        now = self.now()
+        self.events.put((now.timestamp(), now.date().isoformat(), slot, event, session, reason, value))
+
+    def session_start(self, slot, planned, resumed=False):
+        self.session = (int(time.time()), slot)
+        self.record('session_resume' if resumed else 'session_start', slot, self.session[0], value=planned)
+
+    def session_end(self, reason):
+        if self.session is None:
+            return
+        session, slot = self.session
+        self.session = None
+        self.record('session_end', slot, session, reason, time.time() - session)
+
+    def run(self):
+        import sqlite3  # imported off the Tk thread
+        try:
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in ANALYTICS_SCHEMA:
+                connection.execute(statement)
+            connection.commit()
+        except sqlite3.Error as e:
+            print(f"Analytics disabled, cannot open {self.path}: {e}")
+            self.enabled = False
+            return
+        stopping = False
+        while not stopping:
+            batch = [self.events.get()]
+            deadline = time.monotonic() + ANALYTICS_BATCH_SECONDS
+            while len(batch) < ANALYTICS_BATCH_SIZE and batch[-1] is not None:
+                try:
+                    batch.append(self.events.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                stopping = True
+                batch.pop()
+            try:
+                with connection:
+                    connection.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            except sqlite3.Error as e:
+                print(f"Error writing analytics: {e}")
+        connection.close()
+
+    def close(self):
+        """Flush queued events and stop the writer"""
+        if self.thread is not None and self.thread.is_alive():
+            self.events.put(None)
+            self.thread.join(timeout=5)
+
+
+def print_analytics_report(path, days=ANALYTICS_REPORT_DAYS):
+    """Print usage per day and per slot, early exits and PIN failures; returns an exit code"""
+    import sqlite3
+    if not os.path.exists(path):
+        print(f"No analytics database at {path}")
+        return 1
+    started = time.perf_counter()
+    since = (datetime.date.today() - datetime.timedelta(days=days - 1)).isoformat()
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        per_day = connection.execute(
+            "SELECT day, COUNT(*), SUM(value), SUM(reason = 'pin') FROM events "
+            "WHERE event = 'session_end' AND day >= ? GROUP BY day ORDER BY day", (since,)).fetchall()
+        per_slot = connection.execute(
+            "SELECT slot, COUNT(*), AVG(value), SUM(reason = 'pin') FROM events "
+            "WHERE event = 'session_end' AND day >= ? GROUP BY slot ORDER BY slot", (since,)).fetchall()
+        pin_failures = connection.execute(
+            "SELECT day, COUNT(*) FROM events "
+            "WHERE event = 'pin_failure' AND day >= ? GROUP BY day ORDER BY day", (since,)).fetchall()
+        missed = connection.execute(
+            "SELECT COUNT(*) FROM events WHERE event = 'promo_missed' AND day >= ?", (since,)).fetchone()[0]
+    finally:
+        connection.close()
+
+    print(f"Promo sessions since {since} ({days} days)")
+    print("\nUsage per day:")
+    print(f"  {'day':<12}{'sessions':>9}{'minutes':>9}{'early exits':>13}")
+    for day, sessions, seconds, early in per_day:
+        print(f"  {day:<12}{sessions:>9}{seconds / 60:>9.0f}{early:>13}")
+    print("\nUsage per slot:")
+    print(f"  {'slot':<12}{'sessions':>9}{'avg min':>9}{'early exits':>13}")
+    for slot, sessions, average, early in per_slot:
+        print(f"  {slot:<12}{sessions:>9}{average / 60:>9.1f}{early:>13}")
+    print("\nPIN failures per day:")
+    for day, failures in pin_failures:
+        print(f"  {day:<12}{failures:>9}")
+    total_sessions = sum(row[1] for row in per_day)
+    total_early = sum(row[3] for row in per_day)
+    print(f"\nTotal: {total_sessions} sessions, {total_early} closed early by PIN, "
+          f"{sum(row[1] for row in pin_failures)} PIN failures, {missed} windows without a session")
+    print(f"Report built in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return 0
+
+
+# Pooled toast notifications shared by every screen
+class ToastManager:
+    """Shows messages in a small pool of reused toast windows, stacked per anchor
+
+    Messages are queued when every toast is busy, de-duplicated against visible
+    and queued ones, and rate-limited to one new toast per min_interval_ms.
+    """
+
+    def __init__(self, root, pool_size=TOAST_POOL_SIZE, min_interval_ms=TOAST_MIN_INTERVAL_MS,
+                 clock=time.monotonic, metrics=NULL_METRICS):
+        self.root = root
+        self.metrics = metrics
+        self.pool_size = pool_size
+        self.min_interval = min_interval_ms / 1000
+        self.clock = clock
+        self.pool = []  # idle toast slots
+        self.visible = []  # slots on screen, oldest first
+        self.queue = collections.deque()
+        self.last_shown = None
+        self.pump_id = None
+        self.created = 0
+        self.dropped = 0
+
+    def show(self, message, color, duration=5000, text_color='white', anchor='center'):
+        key = (message, anchor)
+        for slot in self.visible:
+            if slot['key'] == key:
+                # Same message already on screen: keep it up a little longer
+                self.root.after_cancel(slot['after_id'])
+                slot['after_id'] = self.root.after(duration, self.hide, slot)
+                return
+        if any(item['key'] == key for item in self.queue):
+            return
+        if len(self.queue) >= TOAST_QUEUE_LIMIT:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append({
+            'key': key, 'message': message, 'color': color, 'duration': duration,
+            'text_color': text_color, 'anchor': anchor,
+        })
+        self.pump()
+
+    def pump(self):
+        if self.pump_id is not None:
+            return
+        while self.queue and len(self.visible) < self.pool_size:
+            if self.last_shown is not None:
+                wait = self.last_shown + self.min_interval - self.clock()
+                if wait > 0:
+                    self.pump_id = self.root.after(math.ceil(wait * 1000), self.resume_pump)
+                    return
+            self.display(self.queue.popleft())
+
+    def resume_pump(self):
+        self.pump_id = None
+        self.pump()
+
+    def new_slot(self):
+        import tkinter as tk
+        window = tk.Toplevel(self.root)
+        window.withdraw()
+        window.overrideredirect(True)
+        window.attributes('-topmost', True)
+        label = tk.Label(
+            window,
+            font=('Arial', 12, 'bold'),
+            padx=20,
+            pady=15,
+            justify='center'
+        )
+        label.pack(fill='both', expand=True)
+        self.created += 1
+        return {'window': window, 'label': label, 'key': None, 'after_id': None, 'anchor': None}
+
+    def display(self, item):
+        if self.metrics.enabled:
+            start = time.perf_counter()
+        slot = self.pool.pop() if self.pool else self.new_slot()
+        width, height = TOAST_SIZES[item['anchor']]
+        slot['key'] = item['key']
+        slot['anchor'] = item['anchor']
+        slot['label'].config(
+            text=item['message'],
+            fg=item['text_color'],
+            bg=item['color'],
+            wraplength=width - 40
+        )
+        self.visible.append(slot)
+        self.restack()
+        slot['window'].deiconify()
+        slot['window'].lift()
+        slot['after_id'] = self.root.after(item['duration'], self.hide, slot)
+        self.last_shown = self.clock()
+        if self.metrics.enabled:
+            self.metrics.observe('toast_show_seconds', time.perf_counter() - start)
+
+    def hide(self, slot):
+        if slot not in self.visible:
+            return
+        slot['window'].withdraw()
+        self.visible.remove(slot)
+        self.pool.append(slot)
+        self.restack()
+        self.pump()
+
+    def restack(self):
+        """Stack visible toasts downwards from the top edge, per anchor"""
+        screen_width = self.root.winfo_screenwidth()
+        offsets = {}
+        for slot in self.visible:
+            width, height = TOAST_SIZES[slot['anchor']]
+            if slot['anchor'] == 'right':
+                x = screen_width - width - TOAST_MARGIN
+            else:
+                x = (screen_width - width) // 2
+            y = offsets.get(slot['anchor'], TOAST_MARGIN)
+            slot['window'].geometry(f"{width}x{height}+{x}+{y}")
+            offsets[slot['anchor']] = y + height + TOAST_GAP
+
+    def clear(self):
+        self.queue.clear()
+        for slot in list(self.visible):
+            self.root.after_cancel(slot['after_id'])
+            self.hide(slot)
+
+
+# Keeps the fullscreen kiosk window on top without a per-second focus_force loop
+class FocusGuard:
+    """Reclaims focus on <FocusOut>, <Visibility> and <Unmap>, with a slow fallback check"""
+
+    def __init__(self, root, ticks, fallback_interval=FOCUS_FALLBACK_INTERVAL):
+        self.root = root
+        self.ticks = ticks
+        self.fallback_interval = fallback_interval
+        self.active = False
+        self.bind_ids = {}
+        self.token = None
+        self.pending_id = None
+        self.reclaims = 0  # times focus had to be taken back
+
+    def start(self):
+        if self.active:
+            return
+        self.active = True
+        for sequence in ('<FocusOut>', '<Visibility>', '<Unmap>'):
+            self.bind_ids[sequence] = self.root.bind(sequence, self.on_event, add='+')
+        self.token = self.ticks.subscribe(self.check, self.fallback_interval)
+        self.raise_window()
+
+    def cancel(self):
+        if not self.active:
+            return
+        self.active = False
+        for sequence, bind_id in self.bind_ids.items():
+            self.root.unbind(sequence, bind_id)
+        self.bind_ids = {}
+        self.ticks.unsubscribe(self.token)
+        self.token = None
+        if self.pending_id is not None:
+            self.root.after_cancel(self.pending_id)
+            self.pending_id = None
+
+    def on_event(self, event):
+        # Focus moving between our own widgets also sends FocusOut, so decide
+        # once focus has settled; coalesce bursts of events into one check
+        if self.active and self.pending_id is None:
+            self.pending_id = self.root.after(FOCUS_EVENT_DELAY_MS, self.check)
+
+    def check(self, now=None):
+        self.pending_id = None
+        if self.active and self.lost_focus():
+            self.reclaims += 1
+            self.raise_window()
+
+    def lost_focus(self):
+        import tkinter as tk
+        try:
+            # None means focus is in another application
+            return self.root.focus_get() is None or not self.root.winfo_viewable()
+        except (KeyError, tk.TclError):
+            return True
+
+    def raise_window(self):
+        if not self.root.winfo_viewable():
+            self.root.deiconify()
+        self.root.attributes('-topmost', True)
+        self.root.lift()
+        self.root.focus_force()
+
+
+# Countdown digits drawn from cached canvas glyphs instead of a relaid-out Label
+class GlyphCountdown:
+    """Stands in for the countdown Label: config(text=, fg=) and pack()
+
+    Every character cell holds one hidden canvas text item per glyph it can
+    show, created once per colour. A tick flips only the cells whose character
+    changed between hidden and normal, so Tk neither re-measures the string nor
+    asks the parent for a new size; the canvas only resizes when the layout of
+    the text does (e.g. 100:00 -> 99:59).
+    """
+    DIGITS = '0123456789'
+
+    def __init__(self, parent, font, fg, bg):
+        import tkinter as tk
+        from tkinter import font as tkfont
+        self.font = tkfont.Font(root=parent, font=font)
+        self.height = self.font.metrics('linespace')
+        self.canvas = tk.Canvas(parent, width=0, height=self.height, bg=bg, highlightthickness=0)
+        # Digits share the widest digit's cell so the readout never shifts sideways
+        self.widths = {'0': max(self.font.measure(digit) for digit in self.DIGITS)}
+        self.fg = fg
+        self.text = ""
+        self.layout = ()  # cell kinds: '0' for any digit, else the character itself
+        self.centers = []  # x of each cell
+        self.glyphs = {}  # color -> per cell {character: canvas item}
+        self.shown = []  # visible item per cell, or None
+
+    def config(self, text=None, fg=None):
+        if fg is not None:
+            self.fg = fg
+        if text is not None:
+            self.text = text
+        self.draw()
+
+    configure = config
+
+    def pack(self, **options):
+        self.canvas.pack(**options)
+
+    def draw(self):
+        layout = tuple('0' if character in self.DIGITS else character for character in self.text)
+        if layout != self.layout:
+            self.relayout(layout)
+        glyphs = self.glyphs.get(self.fg) or self.render(self.fg)
+        for cell, character in enumerate(self.text):
+            item = glyphs[cell][character]
+            shown = self.shown[cell]
+            if item != shown:
+                if shown is not None:
+                    self.canvas.itemconfigure(shown, state='hidden')
+                self.canvas.itemconfigure(item, state='normal')
+                self.shown[cell] = item
+
+    def relayout(self, layout):
+        self.canvas.delete('all')
+        self.glyphs = {}
+        self.layout = layout
+        self.shown = [None] * len(layout)
+        self.centers = []
+        x = 0
+        for kind in layout:
+            if kind not in self.widths:
+                self.widths[kind] = self.font.measure(kind)
+            self.centers.append(x + self.widths[kind] / 2)
+            x += self.widths[kind]
+        self.canvas.config(width=x)
+
+    def render(self, color):
+        """Create the hidden glyph items for one colour"""
+        y = self.height / 2
+        cells = []
+        for kind, x in zip(self.layout, self.centers):
+            cells.append({
+                character: self.canvas.create_text(x, y, text=character, fill=color, font=self.font, state='hidden')
+                for character in (self.DIGITS if kind == '0' else kind)
+            })
+        self.glyphs[color] = cells
+        return cells
+
+
+# Monitor layout, for the overlays that cover every screen but the kiosk's
+class Monitor(collections.namedtuple('Monitor', ('x', 'y', 'width', 'height', 'primary'))):
+    __slots__ = ()
+
+    @property
+    def geometry(self):
+        return f"{self.width}x{self.height}+{self.x}+{self.y}"
+
+
+def xrandr_monitors():
+    import subprocess
+    output = subprocess.run(['xrandr', '--listmonitors'], capture_output=True, text=True,
+                            timeout=MONITOR_DETECT_TIMEOUT, check=True).stdout
+    return parse_xrandr_monitors(output)
+
+
+def parse_xrandr_monitors(output):
+    """Monitors from `xrandr --listmonitors`, e.g. ' 1: +*HDMI-1 1920/477x1080/268+2560+0  HDMI-1'"""
+    import re
+    monitors = []
+    for match in re.finditer(r'^\s*\d+:\s+\+?(\*?)\S*\s+(\d+)/\d+x(\d+)/\d+\+(\d+)\+(\d+)', output, re.MULTILINE):
+        primary, width, height, x, y = match.groups()
+        monitors.append(Monitor(int(x), int(y), int(width), int(height), primary == '*'))
+    return monitors
+
+
+def windows_monitors():
+    """Monitors from EnumDisplayMonitors; the primary one is the one at the origin"""
+    import ctypes
+    from ctypes import wintypes
+    monitors = []
+
+    def found(handle, dc, rect, data):
+        r = rect.contents
+        monitors.append(Monitor(r.left, r.top, r.right - r.left, r.bottom - r.top, (r.left, r.top) == (0, 0)))
+        return 1
+
+    callback_type = ctypes.WINFUNCTYPE(ctypes.c_int, wintypes.HMONITOR, wintypes.HDC,
+                                       ctypes.POINTER(wintypes.RECT), wintypes.LPARAM)
+    ctypes.windll.user32.EnumDisplayMonitors(None, None, callback_type(found), 0)
+    return monitors
+
+
+def detect_monitors(root):
+    """Monitors of this desktop, primary first; the whole screen as one monitor when unknown"""
+    import platform
+    import shutil
+    monitors = []
+    try:
+        if platform.system() == 'Windows':
+            monitors = windows_monitors()
+        elif shutil.which('xrandr'):
+            monitors = xrandr_monitors()
+    except Exception as e:  # OSError, a failed or hung xrandr, or missing Win32 calls
+        print(f"Could not detect monitors: {e}")
+    if not monitors:
+        return [Monitor(0, 0, root.winfo_screenwidth(), root.winfo_screenheight(), True)]
+    return arrange_monitors(monitors)
+
+
+def arrange_monitors(monitors):
+    """Primary monitor first (the kiosk's), then the others top to bottom, left to right"""
+    return sorted(monitors, key=lambda monitor: (not monitor.primary, monitor.y, monitor.x))
+
+
+# Blacks out the extra monitors while the kiosk screens are up
+class MonitorOverlays:
+    """One borderless window per extra monitor, repeating the kiosk's headline
+
+    The overlays have no timers of their own: the renderer's show/update calls,
+    driven by the core's single tick source, redraw all of them.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.primary = None  # monitor the kiosk window goes on
+        self.slots = []  # monitor, window, title and text label per extra monitor
+        self.content = None  # (title, text, color) while shown
+
+    def place(self, monitors):
+        """Build the overlays for an arranged monitor layout; the first monitor is the kiosk's"""
+        import tkinter as tk
+        for slot in self.slots:
+            slot['window'].destroy()
+        self.slots = []
+        self.primary = monitors[0]
+        for monitor in monitors[1:]:
+            window = tk.Toplevel(self.root, bg='black')
+            window.withdraw()
+            window.overrideredirect(True)
+            window.geometry(monitor.geometry)
+            title = tk.Label(window, font=('Arial', 60, 'bold'), fg='white', bg='black')
+            title.pack(expand=True, anchor='s', pady=20)
+            text = tk.Label(window, font=('Arial', 48, 'bold'), bg='black')
+            text.pack(expand=True, anchor='n', pady=20)
+            self.slots.append({'monitor': monitor, 'window': window, 'title': title, 'text': text})
+        if self.content is not None:
+            self.show(*self.content)
+
+    def show(self, title, text, color):
+        self.content = (title, text, color)
+        for slot in self.slots:
+            slot['title'].config(text=title)
+            slot['text'].config(text=text, fg=color)
+            slot['window'].deiconify()
+            slot['window'].attributes('-topmost', True)
+            slot['window'].lift()
+
+    def update(self, text, color):
+        if self.content is None:
+            return
+        self.content = (self.content[0], text, color)
+        for slot in self.slots:
+            slot['text'].config(text=text, fg=color)
+
+    def hide(self):
+        self.content = None
+        for slot in self.slots:
+            slot['window'].withdraw()
+
+
+class RunningStats:
+    """Count, mean and max of a stream of durations (seconds)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def describe(self, scale=1e6, unit='us'):
+        if not self.count:
+            return "no samples"
+        return f"{self.count} samples, avg {self.total / self.count * scale:.1f} {unit}, max {self.max * scale:.1f} {unit}"
+
+
+# Hotkey backends: each calls emit(pressed_at) with a perf_counter() timestamp
+def parse_hotkey(hotkey):
+    """'ctrl+shift+p' -> ({'ctrl', 'shift'}, 'p')"""
+    parts = hotkey.lower().split('+')
+    return frozenset(parts[:-1]), parts[-1]
+
+
+class KeyboardHotkeyBackend:
+    """Global hotkey through the keyboard package's OS hook (runs on the hook thread)"""
+    name = 'keyboard'
+    threaded = True
+
+    def __init__(self, hotkey=HOTKEY):
+        self.modifiers, self.key = parse_hotkey(hotkey)
+        self.pressed = set()
+        self.hook = None
+        self.emit = None
+        self.keystrokes = RunningStats()  # Python time spent per system-wide key event
+
+    def start(self, emit):
+        import keyboard  # optional: pip install keyboard
+        self.emit = emit
+        self.hook = keyboard.hook(self.on_key)
+
+    def stop(self):
+        if self.hook is not None:
+            import keyboard
+            keyboard.unhook(self.hook)
+            self.hook = None
+
+    def on_key(self, event):
+        start = time.perf_counter()
+        name = (event.name or '').lower()
+        for side in ('left ', 'right '):
+            if name.startswith(side):
+                name = name[len(side):]
+        if event.event_type == 'down':
+            # Ignore auto-repeat of a key that is already held
+            if name not in self.pressed:
+                self.pressed.add(name)
+                if name == self.key and self.modifiers <= self.pressed:
+                    self.emit(start)
+        else:
+            self.pressed.discard(name)
+        self.keystrokes.add(time.perf_counter() - start)
+
+
+class TkHotkeyBackend:
+    """Hotkey as a Tk binding: no OS hook, but only works while a promo window has focus"""
+    name = 'tk'
+    threaded = False
+
+    def __init__(self, root, hotkey=HOTKEY):
+        self.root = root
+        modifiers, key = parse_hotkey(hotkey)
+        names = {'ctrl': 'Control', 'alt': 'Alt', 'shift': 'Shift'}
+        parts = [names[modifier] for modifier in sorted(modifiers) if modifier != 'shift']
+        # Tk reports the shifted keysym (P, not p) while Shift is held
+        self.sequence = '<' + '-'.join(parts + ['Key', key.upper() if 'shift' in modifiers else key]) + '>'
+        self.keystrokes = RunningStats()  # non-matching keys never reach Python
+
+    def start(self, emit):
+        def on_hotkey(event):
+            emit(time.perf_counter())
+            return "break"
+        self.root.bind_all(self.sequence, on_hotkey)
+
+    def stop(self):
+        self.root.unbind_all(self.sequence)
+
+
+class FakeHotkeyBackend:
+    """Hotkey source for tests and benchmarks; press() may be called from any thread"""
+    name = 'fake'
+    threaded = True
+
+    def __init__(self):
+        self.emit = None
+        self.keystrokes = RunningStats()
+
+    def start(self, emit):
+        self.emit = emit
+
+    def stop(self):
+        self.emit = None
+
+    def press(self):
+        if self.emit is not None:
+            self.emit(time.perf_counter())
+
+
+def make_hotkey_backend(name, root):
+    """Backend for a hotkey_backend config value; 'auto' prefers the global hook"""
+    if name in ('auto', 'keyboard'):
+        try:
+            import keyboard  # noqa: F401  (optional: pip install keyboard)
+        except ImportError:
+            print("keyboard package not installed: Ctrl+Shift+P only works while the timer window has focus")
+        else:
+            return KeyboardHotkeyBackend()
+    return TkHotkeyBackend(root)
+
+
+# Wakes the loop's thread from other threads without polling while idle
+class LoopWaker:
+    """Runs callback on the loop's thread soon after wake() is called from any thread
+
+    A socketpair's read end is watched with createfilehandler. Tk on Windows
+    cannot watch files, so there a threaded Tcl gets a virtual event queued
+    from the waking thread instead. Only an unthreaded Tcl falls back to
+    polling, every poll_ms after a wakeup and backing off to
+    WAKER_IDLE_POLL_MS while idle.
+    """
+
+    def __init__(self, root, callback, poll_ms):
+        self.root = root
+        self.callback = callback
+        self.poll_ms = poll_ms
+        self.reader = None
+        self.writer = None
+        self.event = None  # virtual event name when woken through Tk's event queue
+        self.bind_id = None
+        self.poll_id = None
+        self.poll_delay = poll_ms
+        self.woken = False  # set by wake() for the fallback poll
+
+    def start(self):
+        import socket
+        self.reader, self.writer = socket.socketpair()
+        self.reader.setblocking(False)
+        self.writer.setblocking(False)
+        try:
+            self.root.tk.createfilehandler(self.reader, FILE_READABLE, self.on_wake)
+            return
+        except (AttributeError,) + tcl_errors():
+            self.reader.close()
+            self.writer.close()
+            self.reader = self.writer = None
+        if self.threaded_tcl():
+            self.event = f"<<LoopWake{id(self)}>>"
+            self.bind_id = self.root.bind(self.event, self.on_wake, '+')
+        else:
+            self.poll()
+
+    def threaded_tcl(self):
+        """Whether other threads may call into the loop's Tcl interpreter"""
+        try:
+            return self.root.tk.getvar('tcl_platform(threaded)') in (1, '1', True)
+        except (AttributeError,) + tcl_errors():
+            return False
+
+    def stop(self):
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
+        if self.event is not None:
+            self.root.unbind(self.event, self.bind_id)
+            self.event = None
+        if self.reader is not None:
+            try:
+                self.root.tk.deletefilehandler(self.reader)
+            except (AttributeError,) + tcl_errors():
+                pass
+            self.reader.close()
+            self.writer.close()
+            self.reader = self.writer = None
+
+    def wake(self):
+        self.woken = True
+        if self.event is not None:
+            try:
+                # tkinter hands the call to the loop's thread, which queues the event
+                self.root.event_generate(self.event, when='tail')
+            except (RuntimeError,) + tcl_errors():
+                pass  # the loop is not running; the next wakeup drains the queue
+            return
+        try:
+            self.writer.send(b'!')
+        except (AttributeError, OSError):
+            pass  # a wakeup is already pending, or the waker is stopped
+
+    def on_wake(self, *args):
+        if self.reader is not None:
+            try:
+                while self.reader.recv(512):
+                    pass
+            except OSError:
+                pass
+        self.callback()
+
+    def poll(self):
+        if self.woken:
+            self.woken = False
+            self.callback()
+            self.poll_delay = self.poll_ms
+        else:
+            self.poll_delay = min(self.poll_delay * 2, WAKER_IDLE_POLL_MS)
+        self.poll_id = self.root.after(self.poll_delay, self.poll)
+
+
+class HotkeyManager:
+    """Hands hotkey presses from any backend to the Tk thread and measures latency"""
+
+    def __init__(self, root, callback, backend):
+        self.root = root
+        self.callback = callback
+        self.backend = backend
+        self.events = queue.SimpleQueue()  # press timestamps from threaded backends
+        self.waker = LoopWaker(root, self.drain, HOTKEY_POLL_MS) if backend.threaded else None
+        self.latency = RunningStats()  # press -> callback finished (dialog built)
+
+    def start(self):
+        if self.waker is not None:
+            self.waker.start()
+        try:
+            self.backend.start(self.emit)
+        except Exception:
+            # The caller falls back to another backend; leave no file handler behind
+            if self.waker is not None:
+                self.waker.stop()
+            raise
+
+    def stop(self):
+        self.backend.stop()
+        if self.waker is not None:
+            self.waker.stop()
+
+    def emit(self, pressed_at):
+        if self.backend.threaded:
+            self.events.put(pressed_at)  # never touch Tk from the hook thread
+            self.waker.wake()
+        else:
+            self.dispatch(pressed_at)
+
+    def drain(self):
+        while True:
+            try:
+                pressed_at = self.events.get_nowait()
+            except queue.Empty:
+                break
+            self.dispatch(pressed_at)
+
+    def dispatch(self, pressed_at):
+        self.callback()
+        self.latency.add(time.perf_counter() - pressed_at)
+
+    def report(self):
+        return (f"Hotkey backend {self.backend.name}: per-keystroke {self.backend.keystrokes.describe()}; "
+                f"hotkey to dialog {self.latency.describe(1e3, 'ms')}")
+
+
+# Runs every pre-shutdown hook at once so the slowest step, not the sum, sets the wait
+class ShutdownPipeline:
+    """Runs hooks in parallel subprocesses with per-step timeouts under one global deadline"""
+
+    def __init__(self, hooks, deadline):
+        self.hooks = hooks
+        self.deadline = deadline
+        self.lock = threading.Lock()
+        self.results = []  # (name, status, seconds) in completion order
+        self.done = threading.Event()
+
+    def start(self):
+        import subprocess  # only needed at the end of a session
+        started = time.monotonic()
+        steps = [threading.Thread(target=self.run_step, args=(subprocess, hook, started), daemon=True)
+                 for hook in self.hooks]
+        for step in steps:
+            step.start()
+
+        def wait_all():
+            for step in steps:
+                step.join()
+            self.done.set()
+
+        threading.Thread(target=wait_all, daemon=True).start()
+
+    def run_step(self, subprocess, hook, started):
+        # All steps start together, so the global deadline caps each step's timeout
+        timeout = min(hook.timeout, self.deadline)
+        # Each step gets its own process group, so a timeout also ends whatever the shell started
+        if os.name == 'nt':
+            group = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {'start_new_session': True}
+        try:
+            process = subprocess.Popen(
+                hook.command, shell=isinstance(hook.command, str), stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **group)
+        except OSError as e:
+            status = f"failed to start: {e}"
+        else:
+            try:
+                code = process.wait(timeout=timeout)
+                status = "ok" if code == 0 else f"exit code {code}"
+            except subprocess.TimeoutExpired:
+                self.kill_step(subprocess, process)
+                process.wait()
+                status = f"killed after {timeout} s"
+        with self.lock:
+            self.results.append((hook.name, status, time.monotonic() - started))
+
+    @staticmethod
+    def kill_step(subprocess, process):
+        """Kill a step with every process it started"""
+        if os.name == 'nt':
+            # No process groups to signal: taskkill /T ends the whole tree
+            result = subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if result.returncode != 0:
+                process.kill()
+            return
+        import signal
+        try:
+            os.killpg(process.pid, signal.SIGKILL)  # the step leads its own session
+        except ProcessLookupError:
+            pass  # the whole group exited just now
+
+    def report(self):
+        with self.lock:
+            results = list(self.results)
+        lines = [f"Pre-shutdown hooks: {len(results)}/{len(self.hooks)} finished"]
+        lines.extend(f"  {name}: {status} ({seconds:.1f} s)" for name, status, seconds in results)
+        return "\n".join(lines)
+
+
+def parse_control_command(line):
+    """(command, seconds or None) for one control request line"""
+    words = line.split()
+    if not words or words[0].lower() not in CONTROL_COMMANDS:
+        raise ValueError(f"unknown command, expected one of: {', '.join(CONTROL_COMMANDS)}")
+    command = words[0].lower()
+    seconds = None
+    if command in ('extend', 'start') and len(words) > 1:
+        try:
+            seconds = int(words[1])
+        except ValueError:
+            seconds = 0
+        if not 1 <= seconds <= 24 * 3600:
+            raise ValueError(f"{command} takes a number of seconds between 1 and 86400")
+    elif command == 'extend':
+        raise ValueError("extend needs a number of seconds")
+    return command, seconds
+
+
+def tcl_errors():
+    """(tkinter.TclError,) once tkinter is loaded; before that nothing can raise it"""
+    tkinter = sys.modules.get('tkinter')
+    return (tkinter.TclError,) if tkinter is not None else ()
+
+
+# Local control API: reader threads queue requests, the Tk thread runs them
+class ControlServer:
+    """Runs one-line commands from any thread on the Tk thread; optionally serves a UNIX socket"""
+
+    def __init__(self, root, handler):
+        self.root = root
+        self.handler = handler  # handler(command, seconds) -> dict, called on the Tk thread
+        self.requests = queue.SimpleQueue()  # (line, reply dict, done event)
+        self.path = None
+        self.listener = None
+        self.waker = LoopWaker(root, self.drain, CONTROL_POLL_MS)
+
+    def start(self):
+        self.waker.start()
+
+    def listen(self, path):
+        """Accept clients on a UNIX socket at path (owner-only permissions)"""
+        import socket
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError("UNIX sockets are not supported on this platform")
+        if os.path.exists(path):
+            os.unlink(path)  # left over from a crash
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(path)
+        os.chmod(path, 0o600)
+        self.listener.listen()
+        self.path = path
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def stop(self):
+        self.waker.stop()
+        if self.listener is None:
+            return
+        self.listener.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def serve(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return  # listener closed
+            threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+
+    def handle(self, connection):
+        with connection:
+            connection.settimeout(CONTROL_TIMEOUT)
+            try:
+                for line in connection.makefile('r', encoding='utf-8'):
+                    if line.strip():
+                        connection.sendall((json.dumps(self.call(line)) + "\n").encode())
+            except OSError:
+                pass
+
+    def call(self, line):
+        reply = {}
+        done = threading.Event()
+        self.requests.put((line, reply, done))
+        self.waker.wake()
+        if not done.wait(CONTROL_TIMEOUT):
+            return {'ok': False, 'error': "timed out waiting for the app"}
+        return reply
+
+    def drain(self):
+        while True:
+            try:
+                line, reply, done = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                reply.update(self.handler(*parse_control_command(line)))
+            except ValueError as e:
+                reply.update(ok=False, error=str(e))
+            done.set()
+
+
+# Station side of fleet.py: one connection, newline-delimited JSON both ways
+class FleetAgent:
+    """Reports status to the fleet controller and runs its requests through the control queue"""
+
+    def __init__(self, address, station, token, control, config_path):
+        self.address = address
+        self.station = station
+        self.token = token
+        self.control = control  # ControlServer; call() is safe from any thread
+        self.config_path = config_path
+        self.connection = None
+        self.send_lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        threading.Thread(target=self.heartbeat, daemon=True).start()
+
+    def stop(self):
+        self.stop_event.set()
+        with self.send_lock:
+            if self.connection is not None:
+                self.connection.close()
+
+    def run(self):
+        import socket
+        delay = 1
+        while not self.stop_event.is_set():
+            try:
+                connection = socket.create_connection(self.address, timeout=10)
+            except OSError:
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, FLEET_RECONNECT_MAX)
+                continue
+            delay = 1
+            connection.settimeout(None)
+            with self.send_lock:
+                self.connection = connection
+            print(f"Fleet: connected to {self.address[0]}:{self.address[1]} as {self.station}")
+            try:
+                self.send({'type': 'hello', 'station': self.station, 'token': self.token,
+                           'status': self.control.call('status')})
+                for line in connection.makefile('r', encoding='utf-8'):
+                    self.handle(json.loads(line))
+            except (OSError, ValueError):
+                pass
+            with self.send_lock:
+                self.connection = None
+            connection.close()
+            if not self.stop_event.is_set():
+                print("Fleet: connection lost, reconnecting")
+
+    def heartbeat(self):
+        while not self.stop_event.wait(FLEET_HEARTBEAT_INTERVAL):
+            if self.connection is not None:
+                self.send({'type': 'heartbeat', 'status': self.control.call('status')})
+
+    def send(self, message):
+        data = (json.dumps(message) + "\n").encode()
+        with self.send_lock:
+            if self.connection is None:
+                return
+            try:
+                self.connection.sendall(data)
+            except OSError:
+                pass  # the reader notices and reconnects
+
+    def handle(self, message):
+        if not isinstance(message, dict) or message.get('type') != 'request':
+            return
+        if 'config' in message:
+            result = self.apply_config(message['config'])
+        else:
+            result = self.control.call(str(message.get('command', '')))
+        self.send({'type': 'reply', 'id': message.get('id'), 'result': result})
+
+    def apply_config(self, updates):
+        if not isinstance(updates, dict):
+            return {'ok': False, 'error': "config must be a JSON object"}
+        refused = sorted(set(updates) - set(FLEET_CONFIG_KEYS))
+        if refused:
+            return {'ok': False, 'error': f"settings not accepted from the controller: {', '.join(refused)}"}
         try:
-            # Try to set up global hotkey for PIN entry
-            keyboard.add_hotkey('ctrl+shift+p', show_pin_dialog)
-            print("Global hotkey set: Ctrl+Shift+P to open PIN dialog")
-        except Exception as e:
-            print(f"Could not set global hotkey: {e}")
-    
-    # Setup global hotkey
-    setup_global_hotkey()
-    
-    # Function to calculate time until activation
-    def get_time_until_activation():
-        now = datetime.datetime.now()
-        if activation_time > now:
-            diff = activation_time - now
-            total_seconds = int(diff.total_seconds())
+            merge_config_file(self.config_path, updates)
+        except (OSError, ConfigError) as e:
+            return {'ok': False, 'error': str(e)}
+        return self.control.call('reload')
+
+
+def waiting_refresh_interval(seconds_until):
+    """Refresh interval for the waiting screen given the time until activation"""
+    for threshold, interval in WAITING_REFRESH_POLICY:
+        if seconds_until > threshold:
+            return interval
+    return 1
+
+
+def format_clock(seconds):
+    """Format seconds as MM:SS"""
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+# Minimal after()-style event loop for the backends that do not run Tk
+class EventLoop:
+    """Timers and file handlers with the subset of the Tk API the core uses"""
+
+    def __init__(self, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self.selector = selectors.DefaultSelector()
+        self.timers = []  # heap of (due, id, callback, args)
+        self.live = set()  # ids scheduled and not yet run or cancelled
+        self.next_id = 0
+        self.running = False
+        self.tk = self  # tkinter-style interpreter handle for createfilehandler()
+
+    def after(self, ms, callback, *args):
+        self.next_id += 1
+        heapq.heappush(self.timers, (self.clock.monotonic() + ms / 1000, self.next_id, callback, args))
+        self.live.add(self.next_id)
+        return self.next_id
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, after_id):
+        self.live.discard(after_id)
+
+    def pending(self):
+        return len(self.live)
+
+    def createfilehandler(self, file, mask, callback):
+        # Only FILE_READABLE is used; callback(file, mask) as in tkinter
+        self.selector.register(file, selectors.EVENT_READ, callback)
+
+    def deletefilehandler(self, file):
+        self.selector.unregister(file)
+
+    def mainloop(self):
+        self.running = True
+        while self.running:
+            timeout = None
+            if self.timers:
+                timeout = max(0.0, self.timers[0][0] - self.clock.monotonic())
+            if self.selector.get_map():
+                # A virtual clock jumps to the next timer instead of blocking
+                warp = self.clock.virtual and timeout is not None
+                ready = self.selector.select(0 if warp else timeout)
+                for key, _ in ready:
+                    key.data(key.fileobj, FILE_READABLE)
+                if warp and not ready:
+                    self.clock.sleep(timeout)
+            elif timeout is not None:
+                self.clock.sleep(timeout)
+            else:
+                break  # nothing left that could ever wake the loop
+            now = self.clock.monotonic()
+            while self.running and self.timers and self.timers[0][0] <= now:
+                _, after_id, callback, args = heapq.heappop(self.timers)
+                if after_id not in self.live:
+                    continue  # cancelled
+                self.live.remove(after_id)
+                callback(*args)
+
+    def quit(self):
+        self.running = False
+
+
+# Scheduling, countdown, threshold and PIN state machine; renderers only draw
+class PromoCore:
+    """UI-agnostic promo timer driven by a renderer's event loop
+
+    The renderer provides `loop` (after/after_cancel/after_idle) and the
+    show_*/update_*/notify methods; the core decides what to show and when.
+    """
+
+    def __init__(self, view, config_watcher, metrics=NULL_METRICS, record=True, clock=SYSTEM_CLOCK):
+        self.view = view
+        self.loop = view.loop
+        self.config_watcher = config_watcher
+        self.config = config_watcher.config
+        self.metrics = metrics
+        self.clock = clock
+
+        # Shared 1 Hz tick source; each screen registers its own subscribers
+        self.ticks = TickDriver(self.loop, now=clock.time, metrics=metrics)
+        self.screen_tick_tokens = []
+        self.screen = None  # 'waiting', 'promo' or 'countdown'
+
+        # Session state (a startup probe or simulation must not touch the journal of a real session)
+        # Seconds turn over between the wall-clock ticks that drain the render state
+        self.timer = TimerEngine(self.config.session_duration, clock, COUNTDOWN_PHASE)
+        self.journal = SessionJournal(JOURNAL_FILE if record else "")
+        self.running = False
+        self.end_reason = 'time_up'  # set to 'stopped' when the control API ends a session
+        self.waiting_for_schedule = False
+        self.pin_attempts = 0
+        self.render_state = None  # RenderState of the running countdown
+        self.active_status = ""
+        self.waiting_refresh_token = None
+        self.pipeline = None
+        self.shutdown_seconds = 0
+        self.ending_text = ""
+
+        # Promo windows indexed for fast "next activation" lookups
+        self.schedule = build_schedule(self.config, clock)
+        self.activation_time = self.schedule.next_activation(self.schedule.now())
+
+        # Session lifecycle events go to SQLite from a writer thread
+        # (a startup probe must not record anything either)
+        self.analytics = AnalyticsStore(self.config.analytics_db, lambda: self.schedule.now())
+        self.record = record
+        if self.config.analytics_db and record:
+            self.analytics.start()
+        else:
+            self.analytics.enabled = False
+        view.attach(self)
+
+    # Subscriptions that belong to the current screen
+    def subscribe_screen_tick(self, callback, interval=1):
+        token = self.ticks.subscribe(callback, interval)
+        self.screen_tick_tokens.append(token)
+        return token
+
+    def call_screen_at(self, timestamp, callback):
+        token = self.ticks.call_at(timestamp, callback)
+        self.screen_tick_tokens.append(token)
+        return token
+
+    def clear_screen_ticks(self):
+        while self.screen_tick_tokens:
+            self.ticks.unsubscribe(self.screen_tick_tokens.pop())
+
+    def enter_screen(self, name):
+        self.clear_screen_ticks()
+        self.ticks.label = name
+        self.screen = name
+
+    def current_slot(self):
+        """Start of the open promo window as HH:MM, for grouping analytics"""
+        window = self.schedule.current_window(self.schedule.now())
+        return self.schedule.to_wall(window[0]).strftime('%H:%M') if window else 'manual'
+
+    def describe_activation(self):
+        if self.activation_time is None:
+            return "none (no upcoming promo window)"
+        return self.activation_time.strftime('%a %Y-%m-%d %I:%M %p')
+
+    def get_time_until_activation(self):
+        if self.activation_time is not None and self.activation_time.timestamp() > self.clock.time():
+            # Compare timestamps so a DST change in between is counted correctly
+            total_seconds = int(self.activation_time.timestamp() - self.clock.time())
             hours = total_seconds // 3600
             minutes = (total_seconds % 3600) // 60
             seconds = total_seconds % 60
             return hours, minutes, seconds
         return 0, 0, 0  # Time has arrived
-    
-    # Check if it's time to activate
-    def check_schedule():
-        nonlocal waiting_for_schedule
-        hours, minutes, seconds = get_time_until_activation()
-        
-        if hours == 0 and minutes == 0 and seconds == 0:
-            # Time has arrived!
-            waiting_for_schedule = False
-            root.after(0, show_promo_screen)
+
+    # Called once when the activation time arrives
+    def check_schedule(self, now=None):
+        if not self.waiting_for_schedule:
+            return
+        # Time has arrived!
+        self.waiting_for_schedule = False
+        self.clear_screen_ticks()
+        self.loop.after(0, self.show_promo_screen)
+
+    # Go back to the waiting screen for the next window, in the same process
+    def return_to_waiting(self, reason):
+        self.pin_attempts = 0
+        self.activation_time = self.schedule.next_activation(self.schedule.now())
+        print(f"{reason} Next activation time: {self.describe_activation()}")
+        self.show_waiting_screen()
+
+    # Close the promo screen when its window ends without START being pressed
+    def end_promo_window(self, now=None):
+        self.analytics.record('promo_missed', self.current_slot())
+        self.return_to_waiting("Promo window closed.")
+
+    def show_waiting_screen(self):
+        self.waiting_for_schedule = True
+        self.enter_screen('waiting')
+
+        # Scheduled time
+        if self.activation_time is None:
+            scheduled_str = "not scheduled"
+        elif self.activation_time.date() == self.schedule.now().date():
+            scheduled_str = self.activation_time.strftime("%I:%M %p")
+        else:
+            scheduled_str = self.activation_time.strftime("%a %I:%M %p")
+        self.view.show_waiting(f"Promo starts at: {scheduled_str}")
+
+        # Start updating countdown (refresh rate adapts to the time left)
+        self.waiting_refresh_token = None
+        self.update_waiting()
+        if self.activation_time is not None:
+            self.waiting_refresh_token = self.subscribe_screen_tick(
+                self.update_waiting,
+                waiting_refresh_interval(self.activation_time.timestamp() - self.clock.time())
+            )
+            # Single precise wake-up at the activation time
+            self.call_screen_at(self.activation_time.timestamp(), self.check_schedule)
+
+    def update_waiting(self, now=None):
+        if not self.waiting_for_schedule or self.activation_time is None:
+            return
+        now = self.schedule.now()
+        seconds_until = self.activation_time.timestamp() - self.clock.time()
+        if seconds_until <= 0:
+            # Missed the precise timer (e.g. the clock was changed)
+            self.check_schedule()
+            return
+        interval = waiting_refresh_interval(seconds_until)
+
+        if interval >= 60:
+            # Minute resolution while the start is far away
+            total_minutes = math.ceil(seconds_until / 60)
+            hours, minutes = divmod(total_minutes, 60)
+            text = f"Time remaining: {hours}h {minutes:02d}m"
+            color = '#00FF00' if hours > 1 else '#FF9900'
+            current = f"Current time: {now.strftime('%I:%M %p')}"
+        else:
+            hours, minutes, seconds = self.get_time_until_activation()
+            if hours > 0:
+                text = f"Time remaining: {hours:02d}:{minutes:02d}:{seconds:02d}"
+                color = '#00FF00' if hours > 1 else '#FF9900'
+            else:
+                text = f"Time remaining: {minutes:02d}:{seconds:02d}"
+                color = '#00FF00' if minutes > 5 else '#FF9900'
+            current = f"Current time: {now.strftime('%I:%M:%S %p')}"
+        self.view.update_waiting(text, color, current)
+
+        if self.waiting_refresh_token is not None:
+            self.ticks.set_interval(self.waiting_refresh_token, interval)
+
+    def show_promo_screen(self):
+        self.enter_screen('promo')
+        config = self.config
+        self.view.show_promo(
+            format_clock(config.session_duration), config.colors['timer'],
+            f"Click START NOW to begin {math.ceil(config.session_duration / 60)}-minute countdown"
+        )
+
+        # Go back to waiting if the window closes before START is pressed
+        window = self.schedule.current_window(self.schedule.now())
+        if window is not None:
+            self.call_screen_at(window[1].timestamp(), self.end_promo_window)
+
+        # Show message that schedule time has arrived
+        self.loop.after(1000, lambda: self.view.notify(
+            "Schedule time has arrived! Click START NOW to begin.", "#00AA00", 3000))
+
+    # START button, control API or resumed session
+    def start_countdown(self, duration=None, resumed=False, fired=()):
+        self.waiting_for_schedule = False
+        config = self.config
+        if duration is None:
+            duration = config.session_duration
+        self.analytics.session_start(self.current_slot(), duration, resumed=resumed)
+
+        self.enter_screen('countdown')
+        self.active_status = f"Countdown Active - {math.ceil(duration / 60)} minutes remaining"
+        self.view.show_countdown(
+            format_clock(duration), config.colors['timer'], self.active_status,
+            describe_popups(popup_thresholds(session_alerts(config)), duration)
+        )
+
+        # Display state written by the timer thread, applied on the loop's thread
+        self.render_state = RenderState()
+        self.running = True
+        self.clock.start_thread(self.run_timer, duration, self.render_state, fired)
+        self.subscribe_screen_tick(self.drain_render_state)
+
+    def run_timer(self, duration, render_state, fired=()):
+        timer = self.timer
+        config = self.config
+        alerts = AlertScheduler(session_alerts(config), fired, duration)
+        thresholds = popup_thresholds(alerts.alerts)
+        timer.start(duration)
+        self.journal.start(duration)
+        # Carry the alerts a resumed session already fired into its new journal
+        for alert in fired:
+            self.journal.alert(alert, duration)
+
+        while self.running:
+            seconds_left = timer.seconds_left()
+            if seconds_left <= 0:
+                break
+
+            # Thresholds, colours and alerts are re-read so config reloads apply live
+            if self.config is not config:
+                config = self.config
+                alerts = alerts.rebuild(session_alerts(config))
+                thresholds = popup_thresholds(alerts.alerts)
+            colors = config.colors
+            # The last popup passed sets the status line; the smallest one is the urgent band
+            band = bisect.bisect_left(thresholds, seconds_left)
+
+            # Update display (colour changes for warnings)
+            if timer.is_paused():
+                render_state.update(
+                    text=format_clock(seconds_left), color=colors['timer'],
+                    status="Countdown paused", status_color='white'
+                )
+            elif band == 0 and thresholds:
+                render_state.update(
+                    text=format_clock(seconds_left), color=colors['urgent'],
+                    status=f"URGENT: {describe_minutes(thresholds[0])} left!",
+                    status_color=colors['urgent']
+                )
+            elif band < len(thresholds):
+                render_state.update(
+                    text=format_clock(seconds_left), color=colors['warning'],
+                    status=f"Warning: {describe_minutes(thresholds[band])} left!",
+                    status_color=colors['warning']
+                )
+            else:
+                render_state.update(
+                    text=format_clock(seconds_left), color=colors['timer'],
+                    status=self.active_status, status_color='white'
+                )
+
+            # Alerts due at this remaining time (an extension re-arms passed ones)
+            for alert in alerts.due(seconds_left):
+                render_state.post_alert(alert)
+
+            # Record progress (flushed to disk in batches)
+            self.journal.record('tick', seconds_left)
+
+            # Wait for the next second boundary of the deadline
+            timer.wait_for_tick()
+            if self.metrics.enabled:
+                # Distance from the whole-second boundary the worker woke for
+                left = timer.remaining()
+                self.metrics.observe('tick_lateness_seconds', abs(round(left) - left), 'countdown_worker')
+
+        # Time's up: alerts at zero (e.g. a forced logout) fire before the TIME'S UP screen;
+        # a session stopped early drops the alerts it never reached
+        if self.running and timer.seconds_left() <= 0:
+            for alert in alerts.end_early() if timer.is_stopped() else alerts.due(0):
+                render_state.post_alert(alert)
+            render_state.update(finished=True)
+
+    # Apply pending display changes on the loop's thread, once per tick
+    def drain_render_state(self, now=None):
+        changes, alerts = self.render_state.take_changes()
+        fields = {key: changes[key] for key in ('text', 'color', 'status', 'status_color') if key in changes}
+        if fields:
+            self.view.update_countdown(**fields)
+
+        for alert in alerts:
+            self.fire_alert(alert)
+
+        if changes.get('finished'):
+            self.clear_screen_ticks()
+            self.time_up()
+
+    def fire_alert(self, alert):
+        config = self.config
+        self.journal.alert(alert, self.timer.seconds_left())
+        if alert.message:
+            color = alert.color or config.colors['warning_popup']
+            # Dark text on the orange warning colour, white otherwise
+            text_color = 'black' if color == config.colors['warning_popup'] else 'white'
+            self.view.notify(alert.message, color, config.popup_duration, text_color, anchor='right')
+        if alert.bell:
+            self.view.bell()
+        if alert.command:
+            self.run_alert_command(alert.command)
+
+    def run_alert_command(self, command):
+        if self.config.alert_dry_run:
+            print(f"Dry run: would run alert command: {command}")
+            return
+        import subprocess
+        try:
+            # Popen returns at once, so the loop never blocks on the command
+            subprocess.Popen(command, shell=isinstance(command, str))
+        except OSError as e:
+            print(f"Alert command failed to start: {e}")
+
+    def time_up(self):
+        config = self.config
+        self.running = False
+        self.timer.stop()
+        self.journal.end(self.end_reason)
+        self.analytics.session_end(self.end_reason)
+        self.end_reason = 'time_up'
+        if config.persistent:
+            status = "TIME'S UP! Session ending..."
+            self.ending_text = "Session will end in {} seconds..."
+        else:
+            status = "TIME'S UP! Shutting down..."
+            self.ending_text = "Computer will shutdown in {} seconds..."
+        self.view.show_time_up(
+            "00:00", config.colors['urgent'], status,
+            "TIME'S UP!\n" + self.ending_text.format(config.shutdown_delay)
+        )
+
+        # Pre-shutdown hooks run in the background during the countdown
+        self.pipeline = None
+        if not config.persistent and config.pre_shutdown_hooks:
+            self.pipeline = ShutdownPipeline(config.pre_shutdown_hooks, config.pre_shutdown_deadline)
+            self.pipeline.start()
+
+        # Start countdown
+        self.shutdown_seconds = config.shutdown_delay
+        self.shutdown_countdown()
+        self.subscribe_screen_tick(self.shutdown_countdown)
+
+    def shutdown_countdown(self, now=None):
+        if not self.view.time_up_visible():
+            self.clear_screen_ticks()
+        elif self.shutdown_seconds > 0:
+            self.view.update_time_up("TIME'S UP!\n" + self.ending_text.format(self.shutdown_seconds))
+            self.shutdown_seconds -= 1
+        elif self.config.persistent:
+            # Daemon mode: keep the process and wait for the next window
+            self.clear_screen_ticks()
+            self.view.close_time_up()
+            self.return_to_waiting("Session finished.")
+        elif self.pipeline is not None and not self.pipeline.done.is_set():
+            # Bounded by pre_shutdown_deadline; keep ticking until every hook is done
+            self.view.update_time_up("TIME'S UP!\nFinishing shutdown tasks...")
+        else:
+            self.clear_screen_ticks()
+            if self.pipeline is not None:
+                print(self.pipeline.report())
+            self.shutdown_computer()
+
+    def shutdown_computer(self):
+        command = self.config.shutdown_command
+        if not command:
+            import platform
+            command = SHUTDOWN_COMMANDS.get(platform.system())
+        if command is None:
+            self.quit()
+            return
+        if self.config.shutdown_dry_run:
+            print(f"Dry run: would shut down with: {command}")
+            self.quit()
+            return
+        import subprocess
+        try:
+            # Popen returns at once, so the loop never blocks on the command
+            subprocess.Popen(command, shell=True)
+        except OSError:
+            # The renderer asks the user to shut down manually, then quits
+            self.view.shutdown_failed()
+        else:
+            self.quit()
+
+    # PIN state machine; the renderer only collects the digits
+    def pin_attempts_left(self):
+        return self.config.max_pin_attempts - self.pin_attempts
+
+    def submit_pin(self, entered):
+        """'ok' (the app quits), 'wrong' or 'locked', with the message to show"""
+        if entered == self.config.pin:
+            # Correct PIN - close app
+            if self.running:
+                self.journal.end('pin')
+                self.analytics.session_end('pin')
+            self.quit()
+            return 'ok', ""
+        # Wrong PIN
+        self.pin_attempts += 1
+        self.analytics.record('pin_failure', self.current_slot())
+        if self.pin_attempts >= self.config.max_pin_attempts:
+            return 'locked', "Too many attempts! App will continue."
+        return 'wrong', f"Wrong PIN! Attempts remaining: {self.pin_attempts_left()}"
+
+    def quit(self):
+        self.view.quit()
+
+    # Runtime controls from the local control socket and the fleet agent
+    def control_status(self):
+        return {
+            'ok': True,
+            'screen': self.screen,
+            'running': self.running,
+            'paused': self.timer.is_paused(),
+            'remaining': self.timer.seconds_left() if self.running else 0,
+            'next_activation': self.activation_time.isoformat() if self.activation_time else None,
+        }
+
+    def handle_control(self, command, seconds):
+        timer = self.timer
+        if command == 'pause':
+            if not self.running or not timer.is_running():
+                return {'ok': False, 'error': "no running countdown to pause"}
+            timer.pause()
+            self.journal.record('pause', timer.seconds_left(), sync=True)
+        elif command == 'resume':
+            if not self.running or not timer.is_paused():
+                return {'ok': False, 'error': "countdown is not paused"}
+            timer.resume()
+            self.journal.record('resume', timer.seconds_left(), sync=True)
+        elif command == 'extend':
+            if not self.running:
+                return {'ok': False, 'error': "no session to extend"}
+            timer.extend(seconds)
+            self.journal.extend(seconds, timer.seconds_left())
+            self.view.notify(f"Session extended by {describe_minutes(seconds)}", "#00AA00", 3000, anchor='right')
+        elif command == 'start':
+            if self.running or self.screen not in ('waiting', 'promo'):
+                return {'ok': False, 'error': "a session is already running"}
+            self.start_countdown(seconds)
+        elif command == 'stop':
+            if not self.running:
+                return {'ok': False, 'error': "no session to stop"}
+            self.end_reason = 'stopped'
+            timer.stop()  # the worker sees zero left and runs the usual time_up path
+        elif command == 'reload':
+            self.reload_config()
+        return self.control_status()
+
+    # Apply config file changes without restarting the app
+    def reload_config(self, now=None):
+        new_config = self.config_watcher.check()
+        if new_config is None:
+            return
+        self.config = new_config
+        print(f"Config reloaded from: {self.config_watcher.path}")
+
+        # A running countdown picks up thresholds and colours on its next tick;
+        # a new schedule moves the pending activation
+        schedule = self.schedule
+        new_schedule = build_schedule(new_config, self.clock)
+        if (new_schedule.starts, new_schedule.ends, new_schedule.windows, new_schedule.closed_dates) != \
+                (schedule.starts, schedule.ends, schedule.windows, schedule.closed_dates):
+            self.schedule = new_schedule
+            self.activation_time = new_schedule.next_activation(new_schedule.now())
+            print(f"Next activation time: {self.describe_activation()}")
+            if self.waiting_for_schedule:
+                self.show_waiting_screen()
+
+    def start(self):
+        """Print the banner and show the first screen"""
+        config = self.config
+        self.ticks.subscribe(self.reload_config, CONFIG_CHECK_INTERVAL)
+
+        # Console message
+        print("=" * 60)
+        print("Promo Timer with Config File and PIN Protection")
+        print("=" * 60)
+        print(f"Schedule read from: {self.config_watcher.path}")
+        print(f"Scheduled activation time: {self.describe_activation()}")
+        print(f"Current time: {self.schedule.now().strftime('%I:%M:%S %p %Z')}")
+        if config.persistent:
+            print("Persistent mode: returning to the waiting screen after each session")
+        print(f"PIN to close app: {config.pin}")
+        if self.view.pin_hint:
+            print(f"Press {self.view.pin_hint} anytime to enter PIN and close app")
+        print("=" * 60)
+
+        # Resume a session that was interrupted by a crash or reboot
+        # (a startup probe must not touch the journal of a real session)
+        resumed = SessionJournal.replay(JOURNAL_FILE) if self.record else None
+
+        # Start inside an open promo window, or wait for the next one
+        if resumed:
+            resume_left, fired = resumed
+            print(f"Resuming interrupted session: {format_clock(resume_left)} remaining")
+            self.start_countdown(resume_left, resumed=True, fired=fired)
+        elif self.schedule.current_window(self.schedule.now()) is None:
+            hours, minutes, seconds = self.get_time_until_activation()
+            print(f"Waiting time: {hours:02d}:{minutes:02d}:{seconds:02d}")
+            print("Showing waiting screen...")
+            self.show_waiting_screen()
         else:
-            # Still waiting
-            root.after(1000, check_schedule)
-    
-    # Show waiting screen
-    def show_waiting_screen():
-        nonlocal waiting_for_schedule
-        waiting_for_schedule = True
-        
-        # Make fullscreen
+            print("Scheduled time has arrived!")
+            print("Showing promo screen...")
+            self.show_promo_screen()
+
+    def close(self):
+        self.journal.close()
+        self.analytics.close()
+
+
+# Render backends: show_*/update_* draw what PromoCore decided, attach() wires input
+class TkRenderer:
+    """Fullscreen Tk kiosk screens, pooled toasts, focus guard and the PIN dialog"""
+    name = 'tk'
+    pin_hint = "Ctrl+Shift+P"
+
+    def __init__(self, metrics=NULL_METRICS, monitors=None):
+        import tkinter as tk
+        self.tk = tk
+        # Create window
+        self.root = tk.Tk()
+        self.root.title("Promo Timer")
+        self.loop = self.root
+        self.core = None
+
+        # Extra monitors are covered once input starts; None detects the layout,
+        # a list of Monitor entries replaces it (the primary one gets the kiosk)
+        self.monitors = monitors
+        self.overlays = MonitorOverlays(self.root)
+
+        # Every notification goes through one pooled toast manager
+        self.toasts = ToastManager(self.root, metrics=metrics)
+        self.focus_guard = None
+
+        # Screens are built once and swapped in and out instead of rebuilt
+        self.screens = {}  # name -> (frame, widgets)
+        self.current_screen = None
+        self.widgets = {}
+        self.pin_window = None
+        self.warning = None
+        self.warning_label = None
+        self.hotkeys = None
+
+    def attach(self, core):
+        self.core = core
+        # Keeps the fullscreen screens on top; cancelled whenever the screen changes
+        self.focus_guard = FocusGuard(self.root, core.ticks)
+
+    def show_screen(self, name, build):
+        """Show the cached screen `name`, building it on first use; returns its widgets"""
+        self.focus_guard.cancel()
+        if name not in self.screens:
+            frame = self.tk.Frame(self.root, bg='black')
+            self.screens[name] = (frame, build(frame))
+        if self.current_screen != name:
+            if self.current_screen is not None:
+                self.screens[self.current_screen][0].pack_forget()
+            self.screens[name][0].pack(expand=True, fill='both')
+            self.current_screen = name
+        self.widgets = self.screens[name][1]
+        return self.widgets
+
+    def kiosk_mode(self):
+        root = self.root
+        # Make fullscreen, on the primary monitor when the overlays cover the others
+        if self.overlays.slots:
+            root.geometry(f"+{self.overlays.primary.x}+{self.overlays.primary.y}")
         root.attributes('-fullscreen', True)
         root.config(bg='black')
-        
+
         # Override close protocol
-        root.protocol("WM_DELETE_WINDOW", handle_close)
-        
+        root.protocol("WM_DELETE_WINDOW", self.handle_close)
+
         # Block keys
         def block_keys(event=None):
             return "break"
-        
+
         root.bind('<Alt-Tab>', block_keys)
         root.bind('<Alt_L>', block_keys)
         root.bind('<Alt_R>', block_keys)
@@ -308,19 +3112,43 @@ def main():
         root.bind('<Control-Escape>', block_keys)
         root.bind('<Win_L>', block_keys)
         root.bind('<Win_R>', block_keys)
-        root.bind('<Alt-F4>', handle_close)
-        
-        # Keep window on top
-        root.attributes('-topmost', True)
-        root.focus_force()
-        
-        # Create waiting screen
-        for widget in root.winfo_children():
-            widget.destroy()
-        
-        frame = tk.Frame(root, bg='black')
-        frame.pack(expand=True, fill='both')
-        
+        root.bind('<Alt-F4>', self.handle_close)
+
+    def window_mode(self):
+        root = self.root
+        # Stop guarding focus before leaving fullscreen
+        self.focus_guard.cancel()
+
+        # Remove fullscreen
+        root.attributes('-fullscreen', False)
+        root.attributes('-topmost', False)
+
+        # Allow normal close now (but still require PIN)
+        root.protocol("WM_DELETE_WINDOW", self.handle_close)
+
+        # Remove keyboard blocking for normal window (except Alt+F4)
+        root.unbind('<Alt-Tab>')
+        root.unbind('<Alt_L>')
+        root.unbind('<Alt_R>')
+        root.unbind('<Escape>')
+        root.unbind('<Control-Escape>')
+        root.unbind('<Win_L>')
+        root.unbind('<Win_R>')
+        root.bind('<Alt-F4>', self.handle_close)  # Keep Alt+F4 blocked
+
+        # Set window size
+        root.geometry("900x500")
+
+        # Center window
+        screen_width = root.winfo_screenwidth()
+        screen_height = root.winfo_screenheight()
+        x = (screen_width - 900) // 2
+        y = (screen_height - 500) // 2
+        root.geometry(f"900x500+{x}+{y}")
+
+    # Build waiting screen widgets (once)
+    def build_waiting_screen(self, frame):
+        tk = self.tk
         # Title
         tk.Label(
             frame,
@@ -329,17 +3157,17 @@ def main():
             fg='white',
             bg='black'
         ).pack(pady=(100, 20))
-        
+
         # Scheduled time
-        scheduled_str = activation_time.strftime("%I:%M %p")
-        tk.Label(
+        scheduled_label = tk.Label(
             frame,
-            text=f"Promo starts at: {scheduled_str}",
+            text="",
             font=('Arial', 36),
             fg='yellow',
             bg='black'
-        ).pack(pady=(0, 50))
-        
+        )
+        scheduled_label.pack(pady=(0, 50))
+
         # Countdown label
         countdown_label = tk.Label(
             frame,
@@ -349,7 +3177,7 @@ def main():
             bg='black'
         )
         countdown_label.pack(pady=(0, 30))
-        
+
         # Current time
         current_label = tk.Label(
             frame,
@@ -359,7 +3187,7 @@ def main():
             bg='black'
         )
         current_label.pack(pady=(0, 100))
-        
+
         # PIN info (hidden by default, shown on Ctrl+Shift+P)
         pin_info = tk.Label(
             frame,
@@ -369,32 +3197,7 @@ def main():
             bg='black'
         )
         pin_info.pack(side='bottom', pady=5)
-        
-        # Update countdown function
-        def update_countdown():
-            if waiting_for_schedule:
-                hours, minutes, seconds = get_time_until_activation()
-                
-                if hours > 0:
-                    countdown_label.config(
-                        text=f"Time remaining: {hours:02d}:{minutes:02d}:{seconds:02d}",
-                        fg='#00FF00' if hours > 1 else '#FF9900'
-                    )
-                else:
-                    countdown_label.config(
-                        text=f"Time remaining: {minutes:02d}:{seconds:02d}",
-                        fg='#00FF00' if minutes > 5 else '#FF9900'
-                    )
-                
-                # Update current time
-                now = datetime.datetime.now()
-                current_label.config(text=f"Current time: {now.strftime('%I:%M:%S %p')}")
-                
-                root.after(1000, update_countdown)
-        
-        # Start updating countdown
-        update_countdown()
-        
+
         # Message
         tk.Label(
             frame,
@@ -403,52 +3206,25 @@ def main():
             fg='#888888',
             bg='black'
         ).pack(side='bottom', pady=30)
-        
-        # Start checking schedule
-        check_schedule()
-    
-    # Show promo screen
-    def show_promo_screen():
-        nonlocal fullscreen_mode
-        fullscreen_mode = True
-        
-        # Clear window
-        for widget in root.winfo_children():
-            widget.destroy()
-        
-        # Make fullscreen
-        root.attributes('-fullscreen', True)
-        root.config(bg='black')
-        
-        # Override close protocol
-        root.protocol("WM_DELETE_WINDOW", handle_close)
-        
-        # Block keys
-        def block_keys(event=None):
-            return "break"
-        
-        root.bind('<Alt-Tab>', block_keys)
-        root.bind('<Alt_L>', block_keys)
-        root.bind('<Alt_R>', block_keys)
-        root.bind('<Escape>', block_keys)
-        root.bind('<Control-Escape>', block_keys)
-        root.bind('<Win_L>', block_keys)
-        root.bind('<Win_R>', block_keys)
-        root.bind('<Alt-F4>', handle_close)
-        
+
+        return {'scheduled': scheduled_label, 'countdown': countdown_label, 'current': current_label}
+
+    def show_waiting(self, scheduled_text):
+        self.kiosk_mode()
+        widgets = self.show_screen('waiting', self.build_waiting_screen)
         # Keep window on top
-        def keep_on_top():
-            if fullscreen_mode:
-                root.attributes('-topmost', True)
-                root.focus_force()
-            root.after(1000, keep_on_top)
-        
-        keep_on_top()
-        
-        # Create frame
-        frame = tk.Frame(root, bg='black')
-        frame.pack(expand=True, fill='both')
-        
+        self.focus_guard.start()
+        widgets['scheduled'].config(text=scheduled_text)
+        self.overlays.show("SCHEDULED PROMO", scheduled_text, 'yellow')
+
+    def update_waiting(self, countdown_text, countdown_color, current_text):
+        self.widgets['countdown'].config(text=countdown_text, fg=countdown_color)
+        self.widgets['current'].config(text=current_text)
+        self.overlays.update(countdown_text, countdown_color)
+
+    # Build promo screen widgets (once)
+    def build_promo_screen(self, frame):
+        tk = self.tk
         # 1. PROMO TIME text
         label1 = tk.Label(
             frame,
@@ -458,57 +3234,18 @@ def main():
             bg='black'
         )
         label1.pack(pady=100)
-        
+
         # 2. Timer display
         timer_label = tk.Label(
             frame,
-            text="59:00",
+            text="",
             font=('Arial', 120, 'bold'),
-            fg='red',
+            fg=self.core.config.colors['timer'],
             bg='black'
         )
         timer_label.pack(pady=50)
-        
+
         # 3. START button
-        def start_countdown():
-            nonlocal fullscreen_mode
-            fullscreen_mode = False
-            
-            # Remove fullscreen
-            root.attributes('-fullscreen', False)
-            root.attributes('-topmost', False)
-            
-            # Allow normal close now (but still require PIN)
-            root.protocol("WM_DELETE_WINDOW", handle_close)
-            
-            # Remove keyboard blocking for normal window (except Alt+F4)
-            root.unbind('<Alt-Tab>')
-            root.unbind('<Alt_L>')
-            root.unbind('<Alt_R>')
-            root.unbind('<Escape>')
-            root.unbind('<Control-Escape>')
-            root.unbind('<Win_L>')
-            root.unbind('<Win_R>')
-            root.bind('<Alt-F4>', handle_close)  # Keep Alt+F4 blocked
-            
-            # Set window size
-            root.geometry("900x500")
-            
-            # Center window
-            screen_width = root.winfo_screenwidth()
-            screen_height = root.winfo_screenheight()
-            x = (screen_width - 900) // 2
-            y = (screen_height - 500) // 2
-            root.geometry(f"900x500+{x}+{y}")
-            
-            # Clear window
-            for widget in root.winfo_children():
-                widget.destroy()
-            
-            # Create countdown screen
-            create_countdown_screen()
-        
-        # Create START button
         start_button = tk.Button(
             frame,
             text="START NOW",
@@ -517,24 +3254,24 @@ def main():
             bg='#00AA00',
             activeforeground='white',
             activebackground='#008800',
-            command=start_countdown,
+            command=lambda: self.core.start_countdown(),
             padx=40,
             pady=15,
             cursor='hand2',
             relief='flat'
         )
         start_button.pack(pady=50)
-        
+
         # Add hover effect
         def on_enter(e):
             start_button.config(bg='#00CC00')
-        
+
         def on_leave(e):
             start_button.config(bg='#00AA00')
-        
+
         start_button.bind("<Enter>", on_enter)
         start_button.bind("<Leave>", on_leave)
-        
+
         # PIN info
         tk.Label(
             frame,
@@ -543,53 +3280,36 @@ def main():
             fg='#888888',
             bg='black'
         ).pack(side='bottom', pady=5)
-        
+
         # Click START NOW message
-        tk.Label(
+        message_label = tk.Label(
             frame,
-            text="Click START NOW to begin 59-minute countdown",
+            text="",
             font=('Arial', 14),
             fg='#888888',
             bg='black'
-        ).pack(side='bottom', pady=20)
-        
-        # Show message that schedule time has arrived
-        root.after(1000, lambda: show_popup("Schedule time has arrived! Click START NOW to begin.", "#00AA00", 3000))
-    
-    def show_popup(message, color, duration=5000):
-        """Show a popup message"""
-        screen_width = root.winfo_screenwidth()
-        popup = tk.Toplevel(root)
-        popup.overrideredirect(True)
-        popup.attributes('-topmost', True)
-        
-        # Position at top center
-        popup.geometry(f"400x80+{(screen_width-400)//2}+20")
-        
-        label = tk.Label(
-            popup,
-            text=message,
-            font=('Arial', 12, 'bold'),
-            fg='white',
-            bg=color,
-            padx=20,
-            pady=15,
-            wraplength=360,
-            justify='center'
         )
-        label.pack(fill='both', expand=True)
-        
-        # Auto close after duration
-        popup.after(duration, popup.destroy)
-    
-    # Create countdown screen (after clicking START)
-    def create_countdown_screen():
-        root.config(bg='black')
-        
+        message_label.pack(side='bottom', pady=20)
+
+        return {'timer': timer_label, 'message': message_label}
+
+    def show_promo(self, timer_text, timer_color, message):
+        # Show the cached promo screen with the current session length
+        widgets = self.show_screen('promo', self.build_promo_screen)
+        widgets['timer'].config(text=timer_text, fg=timer_color)
+        widgets['message'].config(text=message)
+        self.overlays.show("PROMO TIME", timer_text, timer_color)
+        self.kiosk_mode()
+        # Keep window on top (until the countdown screen replaces this one)
+        self.focus_guard.start()
+
+    # Build countdown screen widgets (once)
+    def build_countdown_screen(self, frame):
+        tk = self.tk
         # PIN info frame (top right)
-        pin_frame = tk.Frame(root, bg='black')
+        pin_frame = tk.Frame(frame, bg='black')
         pin_frame.pack(anchor='ne', padx=10, pady=10)
-        
+
         tk.Label(
             pin_frame,
             text="Ctrl+Shift+P to enter PIN",
@@ -597,224 +3317,1004 @@ def main():
             fg='#888888',
             bg='black'
         ).pack()
-        
+
         # New frame
-        new_frame = tk.Frame(root, bg='black')
+        new_frame = tk.Frame(frame, bg='black')
         new_frame.pack(expand=True, fill='both')
-        
-        # Countdown timer label
-        countdown_label = tk.Label(
+
+        # Countdown timer, a Label or cached canvas glyphs (read once, when the screen is built)
+        if self.core.config.countdown_widget == 'canvas':
+            countdown_label = GlyphCountdown(
+                new_frame,
+                font=('Arial', 100, 'bold'),
+                fg=self.core.config.colors['timer'],
+                bg='black'
+            )
+        else:
+            countdown_label = tk.Label(
+                new_frame,
+                text="",
+                font=('Arial', 100, 'bold'),
+                fg=self.core.config.colors['timer'],
+                bg='black'
+            )
+        countdown_label.pack(expand=True)
+
+        # Status label
+        status_label = tk.Label(
+            new_frame,
+            text="",
+            font=('Arial', 20),
+            fg='white',
+            bg='black'
+        )
+        status_label.pack(pady=20)
+
+        # Info label
+        info_label = tk.Label(
             new_frame,
-            text="59:00",
-            font=('Arial', 100, 'bold'),
+            text="",
+            font=('Arial', 12),
+            fg='#888888',
+            bg='black'
+        )
+        info_label.pack(pady=10)
+
+        return {'countdown': countdown_label, 'status': status_label, 'info': info_label}
+
+    def show_countdown(self, text, color, status, info):
+        self.overlays.hide()
+        self.window_mode()
+        self.root.config(bg='black')
+        # Show the cached countdown screen and reset it for this session
+        widgets = self.show_screen('countdown', self.build_countdown_screen)
+        widgets['countdown'].config(text=text, fg=color)
+        widgets['status'].config(text=status, fg='white')
+        widgets['info'].config(text=info)
+
+    def update_countdown(self, text=None, color=None, status=None, status_color=None):
+        label_changes = {}
+        if text is not None:
+            label_changes['text'] = text
+        if color is not None:
+            label_changes['fg'] = color
+        if label_changes:
+            self.widgets['countdown'].config(**label_changes)
+
+        status_changes = {}
+        if status is not None:
+            status_changes['text'] = status
+        if status_color is not None:
+            status_changes['fg'] = status_color
+        if status_changes:
+            self.widgets['status'].config(**status_changes)
+
+    def show_time_up(self, text, color, status, message):
+        tk = self.tk
+        self.widgets['countdown'].config(text=text, fg=color)
+        self.widgets['status'].config(text=status, fg='red')
+
+        # Create shutdown warning
+        warning = self.warning = tk.Toplevel(self.root)
+        warning.attributes('-fullscreen', True)
+        warning.attributes('-topmost', True)
+        warning.config(bg='black')
+
+        # Make warning window block keys too
+        warning.bind('<Alt-Tab>', lambda e: "break")
+        warning.bind('<Escape>', lambda e: "break")
+        warning.bind('<Alt-F4>', lambda e: "break")
+
+        self.warning_label = tk.Label(
+            warning,
+            text=message,
+            font=('Arial', 48, 'bold'),
             fg='red',
+            bg='black',
+            justify='center'
+        )
+        self.warning_label.pack(expand=True)
+
+        # Warning message
+        tk.Label(
+            warning,
+            text="SAVE ALL WORK NOW!",
+            font=('Arial', 28, 'bold'),
+            fg='yellow',
             bg='black'
+        ).pack(pady=20)
+
+    def time_up_visible(self):
+        return self.warning is not None and self.warning.winfo_exists()
+
+    def update_time_up(self, message):
+        self.warning_label.config(text=message)
+
+    def close_time_up(self):
+        self.warning.destroy()
+        self.warning = None
+
+    def notify(self, message, color, duration, text_color='white', anchor='center'):
+        self.toasts.show(message, color, duration, text_color, anchor)
+
+    def bell(self):
+        self.root.bell()
+
+    def shutdown_failed(self):
+        tk = self.tk
+        # If shutdown fails, show error
+        error = tk.Toplevel(self.root)
+        error.title("Error")
+        error.geometry("400x200")
+        tk.Label(
+            error,
+            text="Shutdown failed!\nPlease shutdown manually.",
+            font=('Arial', 16),
+            fg='red'
+        ).pack(expand=True)
+        tk.Button(
+            error,
+            text="OK",
+            command=lambda: [error.destroy(), self.root.quit()],
+            font=('Arial', 14)
+        ).pack(pady=20)
+
+    # Function to show PIN entry dialog
+    def show_pin_dialog(self):
+        tk = self.tk
+        root = self.root
+        core = self.core
+        current_pin_input = ""
+
+        if self.pin_window and self.pin_window.winfo_exists():
+            self.pin_window.destroy()
+
+        pin_window = self.pin_window = tk.Toplevel(root)
+        pin_window.title("Enter PIN to Close")
+        pin_window.geometry("300x200")
+        pin_window.configure(bg='#2c3e50')
+        pin_window.attributes('-topmost', True)
+        pin_window.resizable(False, False)
+        pin_window.grab_set()
+
+        # Center the window
+        pin_window.update_idletasks()
+        x = (root.winfo_screenwidth() - 300) // 2
+        y = (root.winfo_screenheight() - 200) // 2
+        pin_window.geometry(f"300x200+{x}+{y}")
+
+        # Title
+        tk.Label(
+            pin_window,
+            text="ENTER PIN TO CLOSE",
+            font=('Arial', 14, 'bold'),
+            fg='white',
+            bg='#2c3e50'
+        ).pack(pady=10)
+
+        # PIN display
+        pin_display = tk.Label(
+            pin_window,
+            text="",
+            font=('Arial', 24, 'bold'),
+            fg='white',
+            bg='#34495e',
+            width=10,
+            height=2
         )
-        countdown_label.pack(expand=True)
-        
+        pin_display.pack(pady=10)
+
         # Status label
         status_label = tk.Label(
-            new_frame,
-            text="Countdown Active - 59 minutes remaining",
-            font=('Arial', 20),
+            pin_window,
+            text=f"Attempts remaining: {core.pin_attempts_left()}",
+            font=('Arial', 10),
             fg='white',
-            bg='black'
-        )
-        status_label.pack(pady=20)
-        
-        # Info label
-        info_label = tk.Label(
-            new_frame,
-            text="Notifications will appear at 5 minutes and 1 minute",
-            font=('Arial', 12),
-            fg='#888888',
-            bg='black'
+            bg='#2c3e50'
         )
-        info_label.pack(pady=10)
-        
-        # Start countdown in thread
-        def run_timer():
-            nonlocal time_left, running
-            running = True
-            five_min_shown = False
-            one_min_shown = False
-            
-            while running and time_left > 0:
-                # Calculate time
-                mins = time_left // 60
-                secs = time_left % 60
-                
-                # Update display
-                root.after(0, lambda t=f"{mins:02d}:{secs:02d}": countdown_label.config(text=t))
-                
-                # Change color for warnings
-                if time_left <= 300:
-                    root.after(0, lambda: countdown_label.config(fg='orange'))
-                    root.after(0, lambda: status_label.config(text="Warning: 5 minutes left!", fg='orange'))
-                if time_left <= 60:
-                    root.after(0, lambda: countdown_label.config(fg='red'))
-                    root.after(0, lambda: status_label.config(text="URGENT: 1 minute left!", fg='red'))
-                
-                # Check for 5 minute warning
-                if not five_min_shown and time_left <= 300:
-                    five_min_shown = True
-                    show_timer_popup("5 MINUTES LEFT!\nTime is running out", "#FF9900")
-                
-                # Check for 1 minute warning
-                if not one_min_shown and time_left <= 60:
-                    one_min_shown = True
-                    show_timer_popup("PLEASE LOGOUT YOUR ACCOUNTS NOW!\n1 MINUTE LEFT!", "#FF4444")
-                
-                # Wait 1 second
-                time.sleep(1)
-                time_left -= 1
-            
-            # Time's up
-            if time_left <= 0:
-                root.after(0, time_up)
-        
-        def show_timer_popup(message, color):
-            screen_width = root.winfo_screenwidth()
-            popup = tk.Toplevel(root)
-            popup.overrideredirect(True)
-            popup.attributes('-topmost', True)
-            
-            # Position at top right
-            popup.geometry(f"350x100+{screen_width-370}+20")
-            
-            # Set text color based on background
-            text_color = 'black' if color == "#FF9900" else 'white'
-            
-            label = tk.Label(
-                popup,
-                text=message,
+        status_label.pack(pady=5)
+
+        # Number pad frame
+        numpad_frame = tk.Frame(pin_window, bg='#2c3e50')
+        numpad_frame.pack(pady=10)
+
+        # Function to handle number button click
+        def add_digit(digit):
+            nonlocal current_pin_input
+            if len(current_pin_input) < 4:
+                current_pin_input += str(digit)
+                pin_display.config(text="*" * len(current_pin_input))
+
+        # Function to clear PIN
+        def clear_pin():
+            nonlocal current_pin_input
+            current_pin_input = ""
+            pin_display.config(text="")
+
+        # Function to submit PIN
+        def submit_pin():
+            nonlocal current_pin_input
+            result, message = core.submit_pin(current_pin_input)
+            if result == 'ok':
+                # Correct PIN - the core has asked the loop to quit
+                pin_window.destroy()
+                return
+            current_pin_input = ""
+            pin_display.config(text="")
+            status_label.config(text=message, fg='red')
+            if result == 'locked':
+                pin_window.after(2000, pin_window.destroy)
+            else:
+                pin_window.after(1000, lambda: status_label.config(
+                    text=f"Attempts remaining: {core.pin_attempts_left()}",
+                    fg='white'
+                ))
+
+        # Create number buttons (1-9)
+        buttons = []
+        for i in range(1, 10):
+            btn = tk.Button(
+                numpad_frame,
+                text=str(i),
                 font=('Arial', 12, 'bold'),
-                fg=text_color,
-                bg=color,
-                padx=20,
-                pady=15,
-                wraplength=300,
-                justify='center'
-            )
-            label.pack(fill='both', expand=True)
-            
-            # Auto close after 5 seconds
-            popup.after(5000, popup.destroy)
-        
-        def time_up():
-            nonlocal running
-            running = False
-            countdown_label.config(text="00:00", fg='red')
-            status_label.config(text="TIME'S UP! Shutting down...", fg='red')
-            
-            # Create shutdown warning
-            warning = tk.Toplevel(root)
-            warning.attributes('-fullscreen', True)
-            warning.attributes('-topmost', True)
-            warning.config(bg='black')
-            
-            # Make warning window block keys too
-            warning.bind('<Alt-Tab>', lambda e: "break")
-            warning.bind('<Escape>', lambda e: "break")
-            warning.bind('<Alt-F4>', lambda e: "break")
-            
-            label = tk.Label(
-                warning,
-                text="TIME'S UP!\nComputer will shutdown in 10 seconds...",
-                font=('Arial', 48, 'bold'),
-                fg='red',
-                bg='black',
-                justify='center'
+                fg='white',
+                bg='#3498db',
+                width=3,
+                height=1,
+                command=lambda x=i: add_digit(x)
             )
-            label.pack(expand=True)
-            
-            # Warning message
-            tk.Label(
-                warning,
-                text="SAVE ALL WORK NOW!",
-                font=('Arial', 28, 'bold'),
-                fg='yellow',
-                bg='black'
-            ).pack(pady=20)
-            
-            # Countdown function
-            def countdown(seconds):
-                if seconds > 0 and warning.winfo_exists():
-                    label.config(text=f"TIME'S UP!\nComputer will shutdown in {seconds} seconds...")
-                    warning.after(1000, countdown, seconds-1)
-                elif warning.winfo_exists():
-                    shutdown_computer()
-            
-            # Start countdown
-            countdown(10)
-        
-        def shutdown_computer():
-            system = platform.system()
+            btn.grid(row=(i-1)//3, column=(i-1)%3, padx=2, pady=2)
+            buttons.append(btn)
+
+        # Row for 0, Clear, and Submit
+        row_frame = tk.Frame(numpad_frame, bg='#2c3e50')
+        row_frame.grid(row=3, column=0, columnspan=3, pady=2)
+
+        # 0 button
+        tk.Button(
+            row_frame,
+            text="0",
+            font=('Arial', 12, 'bold'),
+            fg='white',
+            bg='#3498db',
+            width=3,
+            height=1,
+            command=lambda: add_digit(0)
+        ).pack(side='left', padx=2)
+
+        # Clear button
+        tk.Button(
+            row_frame,
+            text="C",
+            font=('Arial', 12, 'bold'),
+            fg='white',
+            bg='#e74c3c',
+            width=3,
+            height=1,
+            command=clear_pin
+        ).pack(side='left', padx=2)
+
+        # Submit button
+        tk.Button(
+            row_frame,
+            text="✓",
+            font=('Arial', 12, 'bold'),
+            fg='white',
+            bg='#2ecc71',
+            width=3,
+            height=1,
+            command=submit_pin
+        ).pack(side='left', padx=2)
+
+        # Bind keyboard events
+        def on_key_press(event):
+            if event.char.isdigit():
+                add_digit(event.char)
+            elif event.keysym == 'BackSpace':
+                clear_pin()
+            elif event.keysym == 'Return':
+                submit_pin()
+            elif event.keysym == 'Escape':
+                pin_window.destroy()
+
+        pin_window.bind('<Key>', on_key_press)
+        pin_window.focus_set()
+
+    # Function to handle Alt+F4 with PIN requirement
+    def handle_close(self, event=None):
+        self.show_pin_dialog()
+        return "break"  # Prevent default close action
+
+    # Global hotkey for PIN entry (Ctrl+Shift+P), set up after the first frame
+    def start_input(self):
+        root = self.root
+        self.hotkeys = HotkeyManager(root, self.show_pin_dialog,
+                                     make_hotkey_backend(self.core.config.hotkey_backend, root))
+        try:
+            # Try to set up global hotkey for PIN entry
+            self.hotkeys.start()
+        except Exception as e:
+            # Fall back to a binding that works while the timer window has focus
+            print(f"Could not set global hotkey: {e}")
+            self.hotkeys = HotkeyManager(root, self.show_pin_dialog, TkHotkeyBackend(root))
+            self.hotkeys.start()
+        print(f"Hotkey set ({self.hotkeys.backend.name} backend): Ctrl+Shift+P to open PIN dialog")
+        self.start_overlays()
+
+    # Monitor detection runs a subprocess, so it also stays off the launch path
+    def start_overlays(self):
+        monitors = arrange_monitors(self.monitors) if self.monitors is not None else detect_monitors(self.root)
+        self.overlays.place(monitors)
+        if not self.overlays.slots:
+            return
+        print(f"Monitors: {len(monitors)}, kiosk on {monitors[0].geometry}, "
+              f"overlays on {', '.join(monitor.geometry for monitor in monitors[1:])}")
+        if self.overlays.content is not None:
+            # Move the kiosk screen that is already up onto the primary monitor
+            self.root.attributes('-fullscreen', False)
+            self.kiosk_mode()
+
+    def flush(self):
+        self.root.update_idletasks()
+
+    def report(self):
+        lines = [f"Focus reclaimed {self.focus_guard.reclaims} times since start"]
+        if self.hotkeys is not None:
+            lines.append(self.hotkeys.report())
+        return lines
+
+    def gauges(self):
+        gauges = {
+            'tk_pending_after': len(self.root.tk.splitlist(self.root.tk.call('after', 'info'))),
+            'toast_queue_length': len(self.toasts.queue),
+        }
+        if self.hotkeys is not None:
+            gauges['hotkey_queue_size'] = self.hotkeys.events.qsize()
+        return gauges
+
+    def mainloop(self):
+        self.root.mainloop()
+
+    def quit(self):
+        self.root.quit()
+
+    def close(self):
+        if self.hotkeys is not None:
+            self.hotkeys.stop()
+            print(self.hotkeys.report())
+
+
+# Console output while curses owns the terminal: keep the latest lines for the status bar
+class ConsoleLines:
+    """File-like sink for print() that keeps the last few lines"""
+
+    def __init__(self, limit=CURSES_CONSOLE_LINES):
+        self.lines = collections.deque(maxlen=limit)
+        self.partial = ""
+        self.on_line = None  # called (from any thread) after a line is added
+
+    def write(self, text):
+        self.partial += text
+        while "\n" in self.partial:
+            line, self.partial = self.partial.split("\n", 1)
+            if line.strip():
+                self.lines.append(line)
+                if self.on_line is not None:
+                    self.on_line()
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class CursesRenderer:
+    """Text-mode screens for low-spec stations; no Tk, no X connection"""
+    name = 'curses'
+    pin_hint = "Ctrl+P"
+
+    def __init__(self, metrics=NULL_METRICS):
+        import curses
+        self.curses = curses
+        self.loop = EventLoop()
+        self.core = None
+        self.lines = []  # (text, color) rows of the current screen, drawn centred
+        self.time_up_message = None
+        self.notices = []  # [message, color, after id]
+        self.pin_entry = None  # digits typed while the PIN prompt is open
+        self.pin_status = ""
+        self.quit_on_key = False
+        self.dirty = threading.Event()  # set by other threads' print()
+        self.console = ConsoleLines()
+        self.console.on_line = self.dirty.set
+        self.stdout = sys.stdout
+        sys.stdout = self.console
+        self.screen = curses.initscr()
+        curses.noecho()
+        curses.raw()  # Ctrl+C and Ctrl+Z arrive as keys instead of signals
+        self.screen.keypad(True)
+        self.screen.nodelay(True)
+        try:
+            curses.curs_set(0)
+        except curses.error:
+            pass
+        self.pairs = {}  # curses colour number -> pair number
+        if curses.has_colors():
+            curses.start_color()
+            curses.use_default_colors()
+        self.loop.createfilehandler(sys.stdin, FILE_READABLE, self.on_input)
+
+    def attach(self, core):
+        self.core = core
+        # Redraw lines printed by worker threads about once a second
+        core.ticks.subscribe(self.redraw_if_dirty)
+
+    def color(self, value):
+        """Attribute for the nearest of the 8 basic curses colours to a '#RRGGBB' or named colour"""
+        curses = self.curses
+        if not curses.has_colors():
+            return curses.A_NORMAL
+        named = {'white': '#FFFFFF', 'black': '#000000', 'red': '#FF0000', 'yellow': '#FFFF00'}
+        value = named.get(value, value)
+        try:
+            red, green, blue = (int(value[i:i + 2], 16) > 0x7F for i in (1, 3, 5))
+        except (ValueError, IndexError):
+            return curses.A_NORMAL
+        number = (curses.COLOR_RED if red else 0) | (curses.COLOR_GREEN if green else 0) \
+            | (curses.COLOR_BLUE if blue else 0)
+        if number == curses.COLOR_BLACK:
+            number = curses.COLOR_WHITE  # the background is the terminal's own
+        if number not in self.pairs:
+            self.pairs[number] = len(self.pairs) + 1
+            curses.init_pair(self.pairs[number], number, -1)
+        return curses.color_pair(self.pairs[number]) | curses.A_BOLD
+
+    def redraw(self):
+        curses = self.curses
+        screen = self.screen
+        screen.erase()
+        height, width = screen.getmaxyx()
+        rows = self.lines
+        if self.time_up_message is not None:
+            rows = [(line, 'red') for line in self.time_up_message.split("\n")] + \
+                [("", 'white'), ("SAVE ALL WORK NOW!", 'yellow')]
+        if self.pin_entry is not None:
+            rows = [("ENTER PIN TO CLOSE", 'white'), ("", 'white'),
+                    ("*" * len(self.pin_entry) or "_", 'white'), ("", 'white'),
+                    (self.pin_status or f"Attempts remaining: {self.core.pin_attempts_left()}", 'white'),
+                    ("Enter to submit, Backspace to clear, Esc to cancel", '#888888')]
+        top = max(0, (height - len(rows)) // 2)
+        for offset, (text, color) in enumerate(rows):
+            for index, line in enumerate(text.split("\n")):
+                self.add_line(top + offset + index, line, self.color(color), width, height)
+        for index, (message, color, _) in enumerate(self.notices):
+            self.add_line(index, message.replace("\n", " "), self.color(color) | curses.A_REVERSE, width, height)
+        hint = f"{self.pin_hint}: enter PIN and close app"
+        if self.core is not None and self.core.screen == 'promo':
+            hint = f"Enter: START NOW    {hint}"
+        self.add_line(height - 2, hint, self.color('#888888'), width, height)
+        if self.console.lines:
+            self.add_line(height - 1, self.console.lines[-1], curses.A_DIM, width, height)
+        screen.refresh()
+
+    def add_line(self, row, text, attribute, width, height):
+        if 0 <= row < height:
+            text = text[:max(0, width - 1)]
             try:
-                if system == "Windows":
-                    os.system("shutdown /s /t 1")
-                elif system == "Linux":
-                    os.system("shutdown -h now")
-                elif system == "Darwin":
-                    os.system("sudo shutdown -h now")
-            except:
-                # If shutdown fails, show error
-                error = tk.Toplevel(root)
-                error.title("Error")
-                error.geometry("400x200")
-                tk.Label(
-                    error,
-                    text="Shutdown failed!\nPlease shutdown manually.",
-                    font=('Arial', 16),
-                    fg='red'
-                ).pack(expand=True)
-                tk.Button(
-                    error,
-                    text="OK",
-                    command=lambda: [error.destroy(), root.quit()],
-                    font=('Arial', 14)
-                ).pack(pady=20)
-            else:
-                root.quit()
-        
-        # Start timer thread
-        timer_thread = threading.Thread(target=run_timer, daemon=True)
-        timer_thread.start()
-    
-    # Console message
-    print("=" * 60)
-    print("Promo Timer with Config File and PIN Protection")
-    print("=" * 60)
-    print(f"Schedule read from: {config_file}")
-    print(f"Scheduled activation time: {activation_time.strftime('%I:%M %p')}")
-    print(f"Current time: {datetime.datetime.now().strftime('%I:%M:%S %p')}")
-    print(f"PIN to close app: {pin_code}")
-    print("Press Ctrl+Shift+P anytime to enter PIN and close app")
-    print("=" * 60)
-    
-    # Calculate time until activation
-    hours, minutes, seconds = get_time_until_activation()
-    if hours > 0 or minutes > 0 or seconds > 0:
-        print(f"Waiting time: {hours:02d}:{minutes:02d}:{seconds:02d}")
-        print("Showing waiting screen...")
-        show_waiting_screen()
-    else:
-        print("Scheduled time has arrived!")
-        print("Showing promo screen...")
-        show_promo_screen()
-    
+                self.screen.addstr(row, max(0, (width - len(text)) // 2), text, attribute)
+            except self.curses.error:
+                pass  # writing the bottom-right cell raises; the text is drawn anyway
+
+    def redraw_if_dirty(self, now=None):
+        if self.dirty.is_set():
+            self.dirty.clear()
+            self.redraw()
+
+    def on_input(self, *args):
+        curses = self.curses
+        while True:
+            key = self.screen.getch()
+            if key == -1:
+                break
+            if self.quit_on_key:
+                self.quit()
+            elif key == curses.KEY_RESIZE:
+                pass
+            elif self.pin_entry is not None:
+                self.on_pin_key(key)
+            elif key == 16:  # Ctrl+P
+                self.pin_entry = ""
+                self.pin_status = ""
+            elif key in (10, 13, curses.KEY_ENTER) and self.core.screen == 'promo':
+                self.core.start_countdown()
+        self.redraw()
+
+    def on_pin_key(self, key):
+        curses = self.curses
+        if ord('0') <= key <= ord('9') and len(self.pin_entry) < 4:
+            self.pin_entry += chr(key)
+        elif key in (curses.KEY_BACKSPACE, 127, 8):
+            self.pin_entry = ""
+        elif key == 27:  # Escape
+            self.pin_entry = None
+        elif key in (10, 13, curses.KEY_ENTER):
+            result, message = self.core.submit_pin(self.pin_entry)
+            self.pin_entry = ""
+            self.pin_status = message
+            if result == 'locked':
+                self.loop.after(2000, self.close_pin)
+
+    def close_pin(self):
+        self.pin_entry = None
+        self.redraw()
+
+    def show_waiting(self, scheduled_text):
+        self.lines = [("SCHEDULED PROMO", 'white'), ("", 'white'), (scheduled_text, 'yellow'), ("", 'white'),
+                      ("", 'white'), ("", 'white'), ("", 'white'),
+                      ("Promo will start automatically when time arrives", '#888888')]
+        self.redraw()
+
+    def update_waiting(self, countdown_text, countdown_color, current_text):
+        self.lines[4] = (countdown_text, countdown_color)
+        self.lines[5] = (current_text, 'white')
+        self.redraw()
+
+    def show_promo(self, timer_text, timer_color, message):
+        self.lines = [("PROMO TIME", 'white'), ("", 'white'), (timer_text, timer_color), ("", 'white'),
+                      ("[ START NOW ]", '#00AA00'), ("", 'white'), (message, '#888888')]
+        self.redraw()
+
+    def show_countdown(self, text, color, status, info):
+        self.lines = [(text, color), ("", 'white'), (status, 'white'), ("", 'white'), (info, '#888888')]
+        self.redraw()
+
+    def update_countdown(self, text=None, color=None, status=None, status_color=None):
+        old_text, old_color = self.lines[0]
+        old_status, old_status_color = self.lines[2]
+        self.lines[0] = (old_text if text is None else text, old_color if color is None else color)
+        self.lines[2] = (old_status if status is None else status,
+                         old_status_color if status_color is None else status_color)
+        self.redraw()
+
+    def show_time_up(self, text, color, status, message):
+        self.update_countdown(text, color, status, 'red')
+        self.time_up_message = message
+        self.redraw()
+
+    def time_up_visible(self):
+        return self.time_up_message is not None
+
+    def update_time_up(self, message):
+        self.time_up_message = message
+        self.redraw()
+
+    def close_time_up(self):
+        self.time_up_message = None
+        self.redraw()
+
+    def notify(self, message, color, duration, text_color='white', anchor='center'):
+        if any(notice[0] == message for notice in self.notices):
+            return
+        notice = [message, color, None]
+        notice[2] = self.loop.after(duration, self.hide_notice, notice)
+        self.notices.append(notice)
+        del self.notices[:-TOAST_POOL_SIZE]
+        self.redraw()
+
+    def bell(self):
+        self.curses.beep()
+
+    def hide_notice(self, notice):
+        if notice in self.notices:
+            self.notices.remove(notice)
+            self.redraw()
+
+    def shutdown_failed(self):
+        self.time_up_message = "Shutdown failed!\nPlease shutdown manually.\n\nPress any key"
+        self.quit_on_key = True
+        self.redraw()
+
+    def start_input(self):
+        pass  # keys are read from the first frame on
+
+    def flush(self):
+        self.redraw()
+
+    def report(self):
+        return []
+
+    def gauges(self):
+        return {'pending_callbacks': self.loop.pending(), 'notices': len(self.notices)}
+
+    def mainloop(self):
+        self.loop.mainloop()
+
+    def quit(self):
+        self.loop.quit()
+
+    def close(self):
+        self.curses.noraw()
+        self.curses.endwin()
+        sys.stdout = self.stdout
+        for line in self.console.lines:
+            print(line)
+
+
+class NullRenderer:
+    """Draws nothing; keeps the latest screen values and a timeline for tests and simulations"""
+    name = 'null'
+    pin_hint = None
+
+    def __init__(self, metrics=NULL_METRICS, clock=SYSTEM_CLOCK, auto_start=None):
+        self.loop = EventLoop(clock)
+        self.clock = clock
+        self.auto_start = auto_start  # seconds after the promo screen to press START, None never
+        self.core = None
+        self.screen = {}  # field -> latest value shown
+        self.history = []  # (timestamp, call, fields) for every show/update/notify
+        self.notices = collections.deque(maxlen=TOAST_QUEUE_LIMIT)
+        self.time_up_message = None
+        self.draws = 0
+
+    def attach(self, core):
+        self.core = core
+
+    def draw(self, call, **fields):
+        self.screen.update(fields)
+        self.history.append((self.clock.time(), call, fields))
+        self.draws += 1
+
+    def show_waiting(self, scheduled_text):
+        self.screen = {}
+        self.draw('show_waiting', scheduled=scheduled_text)
+
+    def update_waiting(self, countdown_text, countdown_color, current_text):
+        self.draw('update_waiting', countdown=countdown_text, countdown_color=countdown_color, current=current_text)
+
+    def show_promo(self, timer_text, timer_color, message):
+        self.screen = {}
+        self.draw('show_promo', timer=timer_text, timer_color=timer_color, message=message)
+        if self.auto_start is not None:
+            self.loop.after(int(self.auto_start * 1000), self.press_start)
+
+    def press_start(self):
+        if self.core.screen == 'promo':
+            self.core.start_countdown()
+
+    def show_countdown(self, text, color, status, info):
+        self.screen = {}
+        self.draw('show_countdown', text=text, color=color, status=status, status_color='white', info=info)
+
+    def update_countdown(self, **fields):
+        self.draw('update_countdown', **fields)
+
+    def show_time_up(self, text, color, status, message):
+        self.draw('show_time_up', text=text, color=color, status=status, status_color='red', message=message)
+        self.time_up_message = message
+
+    def time_up_visible(self):
+        return self.time_up_message is not None
+
+    def update_time_up(self, message):
+        self.draw('update_time_up', message=message)
+        self.time_up_message = message
+
+    def close_time_up(self):
+        self.time_up_message = None
+
+    def notify(self, message, color, duration, text_color='white', anchor='center'):
+        self.history.append((self.clock.time(), 'notify', {'message': message, 'color': color}))
+        self.notices.append(message)
+
+    def bell(self):
+        self.history.append((self.clock.time(), 'bell', {}))
+
+    def shutdown_failed(self):
+        self.quit()
+
+    def start_input(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def report(self):
+        return []
+
+    def gauges(self):
+        return {'pending_callbacks': self.loop.pending()}
+
+    def mainloop(self):
+        self.loop.mainloop()
+
+    def quit(self):
+        self.loop.quit()
+
+    def close(self):
+        pass
+
+
+def make_renderer(name, metrics=NULL_METRICS):
+    """Renderer for a render_backend config value"""
+    if name == 'curses':
+        return CursesRenderer(metrics)
+    if name == 'null':
+        return NullRenderer(metrics)
+    return TkRenderer(metrics)
+
+
+def main(exit_after_first_frame=False, backend=None):
+    # Config is validated once and reloaded when the file changes
+    config_watcher = ConfigWatcher(CONFIG_FILE)
+    config = config_watcher.config
+
+    # Optional instrumentation; the null object keeps call sites nearly free
+    metrics = Metrics() if config.metrics else NULL_METRICS
+
+    # The renderer owns the event loop; the core decides what it shows
+    view = make_renderer(backend or config.render_backend, metrics)
+    core = PromoCore(view, config_watcher, metrics, record=not exit_after_first_frame)
+    loop = view.loop
+    ticks = core.ticks
+
+    # Report how often the tick driver woke up, to check power savings
+    last_wakeups = 0
+
+    def report_wakeups(now):
+        nonlocal last_wakeups
+        print(f"[{now.strftime('%H:%M')}] Tick wakeups in the last hour: {ticks.wakeups - last_wakeups}")
+        for line in view.report():
+            print(line)
+        last_wakeups = ticks.wakeups
+
+    ticks.subscribe(report_wakeups, WAKEUP_REPORT_INTERVAL)
+
+    # Sample the loop's pending callbacks and write snapshots while metrics are on
+    def start_metrics():
+        probe_due = time.perf_counter() + METRICS_PROBE_MS / 1000
+
+        # Mainloop lag: how late a scheduled after() callback actually runs
+        def probe_mainloop():
+            nonlocal probe_due
+            metrics.observe('mainloop_lag_seconds', max(0.0, time.perf_counter() - probe_due))
+            probe_due = time.perf_counter() + METRICS_PROBE_MS / 1000
+            loop.after(METRICS_PROBE_MS, probe_mainloop)
+
+        def write_metrics(now=None):
+            for name, value in view.gauges().items():
+                metrics.set_gauge(name, value)
+            try:
+                metrics.write_snapshot(core.config.metrics_file)
+            except OSError as e:
+                print(f"Error writing metrics: {e}")
+
+        loop.after(METRICS_PROBE_MS, probe_mainloop)
+        ticks.subscribe(write_metrics, METRICS_WRITE_INTERVAL)
+        message = f"Metrics: writing {config.metrics_file} every {METRICS_WRITE_INTERVAL} s"
+        if config.metrics_port:
+            try:
+                start_metrics_server(metrics, config.metrics_port)
+                message += f", serving http://127.0.0.1:{config.metrics_port}/metrics"
+            except OSError as e:
+                print(f"Could not start metrics endpoint: {e}")
+        print(message)
+
+    if metrics.enabled:
+        start_metrics()
+
+    # Debug mode: log a sampled profile of every mainloop stall
+    stall_detector = None
+    if config.stall_threshold_ms:
+        stall_detector = StallDetector(loop, config.stall_threshold_ms, config.stall_log, metrics)
+        stall_detector.start()
+        print(f"Stall detector: logging mainloop stalls over {config.stall_threshold_ms} ms to {config.stall_log}")
+
+    # The control queue serves the local socket and the fleet agent alike
+    control = None
+    fleet_agent = None
+    if (config.control_socket or config.fleet_controller) and not exit_after_first_frame:
+        control = ControlServer(loop, core.handle_control)
+        control.start()
+        if config.control_socket:
+            try:
+                control.listen(config.control_socket)
+                print(f"Control socket: {config.control_socket} ({', '.join(CONTROL_COMMANDS)})")
+            except OSError as e:
+                print(f"Could not open control socket {config.control_socket}: {e}")
+        if config.fleet_controller:
+            import socket
+            fleet_agent = FleetAgent(parse_address(config.fleet_controller), config.station_id or socket.gethostname(),
+                                     config.fleet_token, control, config_watcher.path)
+            fleet_agent.start()
+
+    core.start()
+
+    # Report time to first frame, then start input handling off the launch path
+    def on_first_frame():
+        view.flush()
+        elapsed_ms = (time.perf_counter() - STARTUP_T0) * 1000
+        print(f"Startup: first frame after {elapsed_ms:.0f} ms (target {FIRST_FRAME_TARGET_MS} ms)")
+        if exit_after_first_frame:
+            core.quit()
+            return
+        view.start_input()
+
+    loop.after_idle(on_first_frame)
+
     # Run application
-    root.mainloop()
+    try:
+        view.mainloop()
+    finally:
+        view.close()
+        if stall_detector is not None:
+            stall_detector.stop()
+        core.close()
+        if fleet_agent is not None:
+            fleet_agent.stop()
+        if control is not None:
+            control.stop()
 
-if __name__ == "__main__":
-    # First install required package if not installed
+
+# Time warp: run the real core on the null renderer with a virtual clock
+def simulate(config_path, start=None, press_start=SIMULATE_PRESS_START, hours=SIMULATE_HOURS):
+    """Run the schedule in config_path from `start` (timestamp); returns the NullRenderer
+
+    Alert commands and the shutdown are always dry runs, pre-shutdown hooks
+    are skipped and no journal or analytics are written. Console output joins
+    the renderer's history as 'console' entries.
+    """
+    import contextlib
+    clock = VirtualClock(start)
+    watcher = ConfigWatcher(config_path)
+    watcher.config = watcher.config._replace(
+        alert_dry_run=True, shutdown_dry_run=True, pre_shutdown_hooks=(), analytics_db="")
+    view = NullRenderer(clock=clock, auto_start=press_start)
+    console = ConsoleLines()
+    console.on_line = lambda: view.history.append((clock.time(), 'console', {'text': console.lines[-1]}))
+    with contextlib.redirect_stdout(console):
+        core = PromoCore(view, watcher, record=False, clock=clock)
+        view.loop.after(int(hours * 3600 * 1000), view.quit)
+        core.start()
+        view.mainloop()
+        core.close()
+    return view
+
+
+def print_simulation(view, tz=None, verbose=False):
+    """Print the timeline; per-second countdown and waiting updates only with verbose"""
+    for timestamp, call, fields in view.history:
+        if not verbose and (call == 'update_waiting' or (call == 'update_countdown' and set(fields) <= {'text'})):
+            continue
+        when = datetime.datetime.fromtimestamp(timestamp, tz) if tz else datetime.datetime.fromtimestamp(timestamp)
+        details = ", ".join(f"{key}={value!r}" for key, value in fields.items())
+        print(f"{when.strftime('%Y-%m-%d %H:%M:%S')}  {call:<16} {details}")
+
+
+def run_simulation(config_path, start=None, press_start=SIMULATE_PRESS_START, hours=SIMULATE_HOURS,
+                   verbose=False):
     try:
-        import keyboard
-    except ImportError:
-        print("Installing required package: keyboard")
-        import subprocess
-        import sys
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "keyboard"])
-        import keyboard
-    
-    main()
+        config = load_config(config_path)
+    except (OSError, ConfigError) as e:
+        print(f"Config error: {e}")
+        return 1
+    tz = load_timezone(config.timezone)
+    if start is None:
+        schedule = build_schedule(config)
+        activation = schedule.next_activation(schedule.now())
+        if activation is None:
+            print("No upcoming promo window to simulate")
+            return 1
+        timestamp = activation.timestamp() - SIMULATE_LEAD
+    else:
+        when = datetime.datetime.fromisoformat(start)
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=tz) if tz else when.astimezone()
+        timestamp = when.timestamp()
+    started = time.perf_counter()
+    view = simulate(config_path, timestamp, press_start, hours)
+    elapsed = time.perf_counter() - started
+    print_simulation(view, tz, verbose)
+    span = view.clock.time() - timestamp
+    print(f"Simulated {datetime.timedelta(seconds=int(span))} ({len(view.history)} events) in {elapsed:.2f} s")
+    return 0
+
+
+# Startup regression check: import cost and time to first frame
+def run_startup_check():
+    import subprocess
+    import tempfile
+    here = os.path.dirname(os.path.abspath(__file__))
+    failed = False
+
+    # Cumulative import time of this module, from the interpreter's own report
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import promo'],
+        cwd=here, capture_output=True, text=True
+    )
+    import_us = None
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == 'promo':
+            import_us = int(parts[1])
+    if import_us is None:
+        print(f"Import check failed:\n{result.stderr}")
+        return 1
+    import_ms = import_us / 1000
+    print(f"import promo: {import_ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    if import_ms > IMPORT_BUDGET_MS:
+        print("  FAIL: import time over budget")
+        failed = True
+    for module in ('tkinter', 'keyboard', 'platform', 'dataclasses', 'zoneinfo'):
+        if any(line.split('|')[-1].strip() == module for line in result.stderr.splitlines()):
+            print(f"  FAIL: {module} is imported on the launch path")
+            failed = True
+
+    # Process start to first frame (needs a display)
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        print("first frame: skipped (no display)")
+        return 1 if failed else 0
+    # The child writes a default config; keep it out of the package directory
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, os.path.join(here, 'promo.py'), '--exit-after-first-frame'],
+            cwd=workdir, capture_output=True, text=True
+        )
+        frame_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        print(f"First frame check failed, exit code {result.returncode}:\n{result.stdout}{result.stderr}")
+        return 1
+    print(f"first frame: {frame_ms:.0f} ms (target {FIRST_FRAME_TARGET_MS} ms)")
+    if frame_ms > FIRST_FRAME_TARGET_MS:
+        print("  FAIL: time to first frame over target")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Promo Timer")
+    parser.add_argument('--startup-check', action='store_true',
+                        help="check import time and time to first frame against their budgets")
+    parser.add_argument('--exit-after-first-frame', action='store_true',
+                        help="quit as soon as the first screen is drawn (used by --startup-check)")
+    parser.add_argument('--backend', choices=RENDER_BACKENDS,
+                        help="render backend, overriding render_backend from the config")
+    commands = parser.add_subparsers(dest='command')
+    report_parser = commands.add_parser('report', help="summarise session analytics and exit")
+    report_parser.add_argument('--days', type=int, default=ANALYTICS_REPORT_DAYS,
+                               help=f"how many days back to include (default {ANALYTICS_REPORT_DAYS})")
+    report_parser.add_argument('--db', help="analytics database (default: analytics_db from the config)")
+    simulate_parser = commands.add_parser('simulate', help="run the schedule on a virtual clock and print the timeline")
+    simulate_parser.add_argument('--config', default=CONFIG_FILE, help=f"config file (default {CONFIG_FILE})")
+    simulate_parser.add_argument('--start', help="simulated start time, ISO format in the schedule's zone "
+                                                 f"(default: {SIMULATE_LEAD} s before the next activation)")
+    simulate_parser.add_argument('--press-start', type=float, default=SIMULATE_PRESS_START,
+                                 help=f"seconds until START is pressed on the promo screen, negative for never "
+                                      f"(default {SIMULATE_PRESS_START})")
+    simulate_parser.add_argument('--hours', type=float, default=SIMULATE_HOURS,
+                                 help=f"stop after this much simulated time (default {SIMULATE_HOURS})")
+    simulate_parser.add_argument('--verbose', action='store_true', help="include every per-second update")
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        if args.db:
+            db = args.db
+        else:
+            try:
+                db = load_config(CONFIG_FILE).analytics_db
+            except (OSError, ConfigError) as e:
+                print(f"Config error: {e}")
+                sys.exit(1)
+        if not db:
+            print("Analytics are disabled (analytics_db is empty)")
+            sys.exit(1)
+        sys.exit(print_analytics_report(db, args.days))
+    if args.command == 'simulate':
+        sys.exit(run_simulation(args.config, args.start, args.press_start if args.press_start >= 0 else None,
+                                args.hours, args.verbose))
+    if args.startup_check:
+        sys.exit(run_startup_check())
+    main(exit_after_first_frame=args.exit_after_first_frame, backend=args.backend)
@@ -0,0 +1,154 @@
+"""AlertScheduler thresholds and the alerts fired during whole sessions"""
+import os
+import sys
+import time
+import unittest
+
+import promo
+
+from .test_session import SessionTestCase, berlin, calls, near
+
+
+class AlertSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.alerts = tuple(promo.Alert(at, f"{at} left") for at in (600, 300, 60, 0))
+        self.scheduler = promo.AlertScheduler(self.alerts)
+
+    def at(self, alerts):
+        return [alert.at for alert in alerts]
+
+    def test_fires_each_threshold_once(self):
+        self.assertEqual(self.at(self.scheduler.due(700)), [])
+        self.assertEqual(self.at(self.scheduler.due(600)), [600])
+        self.assertEqual(self.at(self.scheduler.due(599)), [])
+        self.assertEqual(self.at(self.scheduler.due(300)), [300])
+        # A tick that skips several thresholds fires them largest first
+        self.assertEqual(self.at(self.scheduler.due(0)), [60, 0])
+
+    def test_extension_rearms_passed_alerts(self):
+        self.scheduler.due(250)
+        self.assertEqual(self.at(self.scheduler.due(400)), [])
+        self.assertEqual(self.at(self.scheduler.due(300)), [300])
+
+    def test_end_early_keeps_only_zero_alerts(self):
+        self.scheduler.due(500)
+        self.assertEqual(self.at(self.scheduler.end_early()), [0])
+        self.assertEqual(self.scheduler.due(0), [])
+
+    def test_alerts_past_the_starting_length_do_not_fire(self):
+        scheduler = promo.AlertScheduler(self.alerts, start=300)
+        self.assertEqual(self.at(scheduler.due(300)), [])
+        self.assertEqual(self.at(scheduler.due(60)), [60])
+        # An extension past a skipped alert still re-arms it
+        self.assertEqual(self.at(scheduler.due(700)), [])
+        self.assertEqual(self.at(scheduler.due(600)), [600])
+
+    def test_rebuild_keeps_fired_alerts_fired(self):
+        self.scheduler.due(300)
+        rebuilt = self.scheduler.rebuild(self.alerts + (promo.Alert(120, "two minutes"),))
+        self.assertEqual(self.at(rebuilt.due(120)), [120])
+
+
+class SessionAlertTest(SessionTestCase):
+
+    def test_alerts_fire_at_each_threshold(self):
+        alerts = [{'at': 300, 'message': "five"}, {'at': 60, 'message': "one"}, {'at': 0, 'bell': True}]
+        core, view = self.make_core(start=berlin('2026-06-01T12:00:00'), session_duration=600, alerts=alerts)
+        self.run_loop(view, core.start_countdown)
+        (started, _), = calls(view, 'show_countdown')
+        notices = [(fields['message'], timestamp - started) for timestamp, fields in calls(view, 'notify')]
+        self.assertEqual([message for message, _ in notices], ["five", "one"])
+        for (_, elapsed), expected in zip(notices, (300, 540)):
+            self.assertTrue(near(elapsed, expected), (expected, elapsed))
+        (bell, _), = calls(view, 'bell')
+        self.assertTrue(near(bell - started, 600))
+
+    def test_short_session_skips_longer_alerts(self):
+        alerts = [{'at': 1800, 'message': "30 left", 'command': "echo thirty"}, {'at': 60, 'message': "one"}]
+        core, view = self.make_core(session_duration=600, alerts=alerts)
+        self.run_loop(view, core.start_countdown)
+        self.assertEqual([fields['message'] for _, fields in calls(view, 'notify')], ["one"])
+        self.assertNotIn("would run alert command", self.output.getvalue())
+
+    def test_status_lines_follow_the_configured_popups(self):
+        alerts = [{'at': 600, 'message': "ten"}, {'at': 120, 'message': "two"}, {'at': 30, 'bell': True}]
+        core, view = self.make_core(session_duration=900, warning_seconds=300, urgent_seconds=60, alerts=alerts)
+        self.run_loop(view, core.start_countdown)
+        (_, shown), = calls(view, 'show_countdown')
+        self.assertEqual(shown['info'], "Notifications will appear at 10 minutes and 2 minutes")
+        statuses = {fields['status']: fields['status_color']
+                    for _, fields in calls(view, 'update_countdown') if 'status' in fields}
+        colors = promo.DEFAULT_COLORS
+        self.assertEqual(statuses["Warning: 10 minutes left!"], colors['warning'])
+        self.assertEqual(statuses["URGENT: 2 minutes left!"], colors['urgent'])
+        self.assertEqual(len(statuses), 3)  # and the plain countdown status before the first popup
+
+    def test_default_warning_and_urgent_popups(self):
+        core, view = self.make_core(session_duration=200, warning_seconds=120, urgent_seconds=60)
+        self.run_loop(view, core.start_countdown)
+        messages = [fields['message'] for _, fields in calls(view, 'notify')]
+        self.assertEqual(len(messages), 2)
+        self.assertIn("2 MINUTES LEFT", messages[0])
+        self.assertIn("1 MINUTE LEFT", messages[1])
+
+    def test_shutdown_dry_run_does_not_skip_alert_commands(self):
+        marker = os.path.join(self.directory, "ran")
+        alerts = [{'at': 0, 'command': [sys.executable, "-c", f"open({marker!r}, 'w').close()"]}]
+        core, view = self.make_core(session_duration=5, alert_dry_run=False, alerts=alerts)
+        self.run_loop(view, core.start_countdown)
+        self.assertNotIn("would run alert command", self.output.getvalue())
+        for _ in range(100):
+            if os.path.exists(marker):
+                break
+            time.sleep(0.05)
+        self.assertTrue(os.path.exists(marker))
+
+    def test_stop_fires_only_end_of_session_alerts(self):
+        alerts = [
+            {'at': 1800, 'message': "30 min left", 'command': "echo thirty"},
+            {'at': 300, 'message': "5 min left"},
+            {'at': 0, 'message': "bye", 'bell': True},
+        ]
+        core, view = self.make_core(session_duration=3540, alerts=alerts)
+        view.loop.after(10000, lambda: core.handle_control('stop', 0))
+        self.run_loop(view, core.start_countdown)
+        self.assertEqual([fields['message'] for _, fields in calls(view, 'notify')], ["bye"])
+        self.assertEqual(len(calls(view, 'bell')), 1)
+        self.assertNotIn("would run alert command", self.output.getvalue())
+        self.assertEqual(len(calls(view, 'show_time_up')), 1)
+
+    def test_resumed_session_does_not_refire_alerts(self):
+        cwd = os.getcwd()
+        os.chdir(self.directory)  # the journal lives in the working directory
+        self.addCleanup(os.chdir, cwd)
+        alerts = [{'at': 1800, 'message': "30 min left", 'command': "echo thirty"}]
+        core, view = self.make_core(record=True, session_duration=3540, alerts=alerts)
+
+        def crash():
+            core.journal.close()
+            view.quit()
+
+        view.loop.after((3540 - 1700) * 1000, crash)
+        self.run_loop(view, core.start_countdown)
+        core.running = False
+        core.timer.stop()
+        self.assertEqual(self.output.getvalue().count("would run alert command"), 1)
+
+        remaining, fired = promo.SessionJournal.replay(promo.JOURNAL_FILE)
+        self.assertIn(remaining, (1700, 1701))  # the last tick journaled before the crash
+        self.assertEqual({alert.at for alert in fired}, {1800})
+
+        resumed, resumed_view = self.make_core(start=view.clock.time(), record=True,
+                                               session_duration=3540, alerts=alerts)
+        resumed_view.loop.after(5000, resumed_view.quit)
+        self.run_loop(resumed_view, resumed.start)
+        resumed.running = False
+        resumed.timer.stop()
+        self.assertIn("Resuming interrupted session", self.output.getvalue())
+        self.assertEqual(calls(resumed_view, 'notify'), [])
+        self.assertEqual(self.output.getvalue().count("would run alert command"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
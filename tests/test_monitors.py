@@ -0,0 +1,100 @@
+"""Monitor layout parsing and the overlays on injected monitor lists"""
+import contextlib
+import io
+import os
+import unittest
+
+import promo
+
+XRANDR_OUTPUT = """Monitors: 3
+ 0: +HDMI-1 1920/477x1080/268+2560+0  HDMI-1
+ 1: +*DP-1 2560/597x1440/336+0+0  DP-1
+ 2: +VGA-1 1024/300x768/200+0+1440  VGA-1
+"""
+
+
+def tk_display():
+    if os.name != 'nt' and not os.environ.get('DISPLAY'):
+        return False
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+    except Exception:  # ImportError, or TclError without a display
+        return False
+    return True
+
+
+class MonitorLayoutTest(unittest.TestCase):
+
+    def test_parse_xrandr(self):
+        self.assertEqual(promo.parse_xrandr_monitors(XRANDR_OUTPUT), [
+            promo.Monitor(2560, 0, 1920, 1080, False),
+            promo.Monitor(0, 0, 2560, 1440, True),
+            promo.Monitor(0, 1440, 1024, 768, False),
+        ])
+        self.assertEqual(promo.parse_xrandr_monitors("Monitors: 0\n"), [])
+
+    def test_primary_first_then_top_left(self):
+        monitors = promo.arrange_monitors(promo.parse_xrandr_monitors(XRANDR_OUTPUT))
+        self.assertEqual([monitor.geometry for monitor in monitors],
+                         ["2560x1440+0+0", "1920x1080+2560+0", "1024x768+0+1440"])
+
+    def test_without_a_primary_the_top_left_monitor_gets_the_kiosk(self):
+        monitors = promo.arrange_monitors([promo.Monitor(1920, 0, 1920, 1080, False),
+                                           promo.Monitor(0, 0, 1920, 1080, False)])
+        self.assertEqual(monitors[0], promo.Monitor(0, 0, 1920, 1080, False))
+
+
+@unittest.skipUnless(tk_display(), "needs a Tk display")
+class MonitorOverlaysTest(unittest.TestCase):
+
+    MONITORS = [
+        promo.Monitor(1920, 0, 1280, 1024, False),
+        promo.Monitor(0, 0, 1920, 1080, True),
+        promo.Monitor(-1280, 0, 1280, 1024, False),
+    ]
+
+    def setUp(self):
+        self.view = promo.TkRenderer(monitors=self.MONITORS)
+        self.addCleanup(self.view.root.destroy)
+        self.overlays = self.view.overlays
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.view.start_overlays()
+
+    def pending_after(self):
+        return len(self.view.root.tk.splitlist(self.view.root.tk.call('after', 'info')))
+
+    def test_one_overlay_per_extra_monitor(self):
+        self.assertEqual(self.overlays.primary, promo.Monitor(0, 0, 1920, 1080, True))
+        self.assertEqual([slot['monitor'] for slot in self.overlays.slots],
+                         [self.MONITORS[2], self.MONITORS[0]])
+
+    def test_single_monitor_has_no_overlays(self):
+        view = promo.TkRenderer(monitors=[promo.Monitor(0, 0, 1920, 1080, True)])
+        self.addCleanup(view.root.destroy)
+        view.start_overlays()
+        self.assertEqual(view.overlays.slots, [])
+
+    def test_overlays_follow_the_renderer_without_timers_of_their_own(self):
+        pending = self.pending_after()
+        self.overlays.show("SCHEDULED PROMO", "Promo starts at: 01:30 PM", 'yellow')
+        self.overlays.update("Time remaining: 00:00:05", '#FF9900')
+        self.view.flush()
+        for slot in self.overlays.slots:
+            self.assertEqual(slot['window'].state(), 'normal')
+            self.assertEqual(slot['title'].cget('text'), "SCHEDULED PROMO")
+            self.assertEqual(slot['text'].cget('text'), "Time remaining: 00:00:05")
+        self.assertEqual(self.pending_after(), pending)
+        self.overlays.hide()
+        self.assertTrue(all(slot['window'].state() == 'withdrawn' for slot in self.overlays.slots))
+
+    def test_overlays_shown_before_placement_appear_once_placed(self):
+        view = promo.TkRenderer(monitors=self.MONITORS)
+        self.addCleanup(view.root.destroy)
+        view.overlays.show("PROMO TIME", "59:00", 'red')
+        view.overlays.place(promo.arrange_monitors(self.MONITORS))
+        self.assertEqual([slot['text'].cget('text') for slot in view.overlays.slots], ["59:00", "59:00"])
+
+
+if __name__ == "__main__":
+    unittest.main()
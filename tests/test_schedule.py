@@ -0,0 +1,99 @@
+"""Schedule lookups: weekdays, closed dates, midnight crossings and DST changes"""
+import datetime
+import random
+import unittest
+
+import promo
+
+BERLIN = promo.load_timezone('Europe/Berlin')
+
+
+def at(text):
+    """Aware Europe/Berlin datetime for a wall-clock time"""
+    return datetime.datetime.fromisoformat(text).replace(tzinfo=BERLIN)
+
+
+def window(start, end, days='daily', **extra):
+    return promo.parse_window(dict({'start': start, 'end': end, 'days': days}, **extra))
+
+
+def schedule(*windows, closed_dates=()):
+    return promo.Schedule(windows, frozenset(datetime.date.fromisoformat(day) for day in closed_dates), BERLIN)
+
+
+class ScheduleTest(unittest.TestCase):
+
+    def test_daily_window(self):
+        daily = schedule(window("13:30", "14:30"))
+        self.assertEqual(daily.next_activation(at('2026-06-01T09:00')), at('2026-06-01T13:30'))
+        self.assertEqual(daily.next_activation(at('2026-06-01T13:30')), at('2026-06-02T13:30'))
+        self.assertEqual(daily.current_window(at('2026-06-01T14:00')),
+                         (at('2026-06-01T13:30'), at('2026-06-01T14:30')))
+        self.assertIsNone(daily.current_window(at('2026-06-01T14:30')))
+
+    def test_weekdays_wrap_around_the_week(self):
+        # 2026-06-05 is a Friday
+        week = schedule(window("09:00", "10:00", 'mon-fri'), window("12:00", "13:00", ['sat']))
+        self.assertEqual(week.next_activation(at('2026-06-05T11:00')), at('2026-06-06T12:00'))
+        self.assertEqual(week.next_activation(at('2026-06-06T13:30')), at('2026-06-08T09:00'))
+        self.assertIsNone(week.current_window(at('2026-06-07T09:30')))
+
+    def test_closed_and_excepted_dates_are_skipped(self):
+        closed = schedule(window("13:30", "14:30", **{'except': ['2026-06-02']}), closed_dates=['2026-06-01'])
+        self.assertEqual(closed.next_activation(at('2026-05-31T20:00')), at('2026-06-03T13:30'))
+        self.assertIsNone(closed.current_window(at('2026-06-01T14:00')))
+
+    def test_window_across_midnight_into_the_next_week(self):
+        late = schedule(window("23:00", "01:00", ['sun']))
+        # 2026-06-08 is a Monday: Sunday's window is still open
+        self.assertEqual(late.current_window(at('2026-06-08T00:30')),
+                         (at('2026-06-07T23:00'), at('2026-06-08T01:00')))
+        self.assertEqual(late.next_activation(at('2026-06-08T00:30')), at('2026-06-14T23:00'))
+
+    def test_wall_clock_time_is_kept_across_dst(self):
+        daily = schedule(window("13:30", "14:30"))
+        before = daily.next_activation(at('2026-03-28T14:00'))
+        self.assertEqual(before, at('2026-03-29T13:30'))
+        self.assertEqual(before.utcoffset(), datetime.timedelta(hours=2))
+        # Only 23 hours pass between the two activations on the spring-forward day
+        first = daily.next_activation(at('2026-03-28T12:00'))
+        self.assertEqual(before.timestamp() - first.timestamp(), 23 * 3600)
+
+    def test_window_in_the_dst_gap_starts_after_the_gap(self):
+        gap = schedule(window("02:30", "03:30"))
+        start = gap.next_activation(at('2026-03-29T00:00'))
+        local = datetime.datetime.fromtimestamp(start.timestamp(), BERLIN)
+        self.assertEqual(local.strftime('%Y-%m-%d %H:%M %Z'), "2026-03-29 03:30 CEST")
+
+    def test_ambiguous_time_uses_the_first_occurrence(self):
+        repeat = schedule(window("02:30", "03:00"))
+        start = repeat.next_activation(at('2026-10-25T00:00'))
+        local = datetime.datetime.fromtimestamp(start.timestamp(), BERLIN)
+        self.assertEqual(local.strftime('%H:%M %Z'), "02:30 CEST")
+
+    def test_bisect_lookup_matches_a_linear_scan(self):
+        rng = random.Random(7)
+        windows = []
+        for _ in range(200):
+            start = rng.randrange(0, 24 * 3600, 60)
+            days = sorted(rng.sample(promo.WEEKDAY_NAMES, rng.randint(1, 7)))
+            windows.append(promo.PromoWindow(start, start + rng.randrange(60, 3 * 3600, 60),
+                                             promo.parse_weekdays(days)))
+        busy = schedule(*windows)
+        monday = at('2026-06-01T00:00')
+        occurrences = []
+        for entry in windows:
+            for week in (-1, 0, 1):
+                for day in entry.weekdays:
+                    begin = monday + datetime.timedelta(weeks=week, days=day, seconds=entry.start)
+                    occurrences.append((begin, begin + datetime.timedelta(seconds=entry.end - entry.start)))
+        for _ in range(300):
+            now = monday + datetime.timedelta(seconds=rng.randrange(7 * 24 * 3600))
+            upcoming = min(begin for begin, _ in occurrences if begin > now)
+            self.assertEqual(busy.next_activation(now), upcoming)
+            is_open = any(begin <= now < end for begin, end in occurrences)
+            self.assertEqual(busy.current_window(now) is not None, is_open)
+
+
+if __name__ == "__main__":
+    unittest.main()
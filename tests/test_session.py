@@ -0,0 +1,101 @@
+"""Whole countdown sessions run by PromoCore with the null renderer on a virtual clock"""
+import contextlib
+import datetime
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import promo
+
+BERLIN = promo.load_timezone('Europe/Berlin')
+
+
+def berlin(text):
+    """Timestamp of a Europe/Berlin wall-clock time"""
+    return datetime.datetime.fromisoformat(text).replace(tzinfo=BERLIN).timestamp()
+
+
+def calls(view, call):
+    return [(timestamp, fields) for timestamp, name, fields in view.history if name == call]
+
+
+def near(elapsed, expected):
+    """Seconds into the session, allowing for the deadline's phase shift and the drain tick"""
+    return expected - 0.5 <= elapsed <= expected + 1.5
+
+
+class SessionTestCase(unittest.TestCase):
+    """Config files in a temporary directory and PromoCore on a virtual clock"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.output = io.StringIO()
+
+    def write_config(self, **settings):
+        config = dict({'shutdown_delay': 0, 'alert_dry_run': True, 'shutdown_dry_run': True, 'analytics_db': ""},
+                      **settings)
+        path = os.path.join(self.directory, promo.CONFIG_FILE)
+        with open(path, 'w') as f:
+            json.dump(config, f)
+        return path
+
+    def make_core(self, start=None, record=False, **settings):
+        path = self.write_config(**settings)
+        clock = promo.VirtualClock(start)
+        view = promo.NullRenderer(clock=clock)
+        with contextlib.redirect_stdout(self.output):
+            core = promo.PromoCore(view, promo.ConfigWatcher(path), record=record, clock=clock)
+        return core, view
+
+    def run_loop(self, view, function=None):
+        with contextlib.redirect_stdout(self.output):
+            if function is not None:
+                function()
+            view.mainloop()
+
+    def countdown_texts(self, view):
+        return [fields['text'] for _, fields in calls(view, 'update_countdown') if 'text' in fields]
+
+
+class SessionTest(SessionTestCase):
+
+    def test_countdown_shows_every_second(self):
+        core, view = self.make_core(start=5000.9, session_duration=120)
+        self.run_loop(view, core.start_countdown)
+        self.assertEqual(self.countdown_texts(view), [promo.format_clock(s) for s in range(120, 0, -1)])
+        (started, _), = calls(view, 'show_countdown')
+        (ended, _), = calls(view, 'show_time_up')
+        self.assertTrue(near(ended - started, 120))
+
+    def test_unwritable_journal_does_not_stop_the_session(self):
+        cwd = os.getcwd()
+        os.chdir(self.directory)  # the journal lives in the working directory
+        self.addCleanup(os.chdir, cwd)
+        os.mkdir(promo.JOURNAL_FILE)
+        core, view = self.make_core(record=True, session_duration=60)
+        self.run_loop(view, core.start_countdown)
+        self.assertEqual(len(calls(view, 'show_time_up')), 1)
+        self.assertIn("Session journal disabled", self.output.getvalue())
+
+    def test_countdown_across_dst_change(self):
+        # Europe/Berlin springs forward at 02:00 on 2026-03-29; the session still lasts 59 minutes
+        path = self.write_config(timezone='Europe/Berlin', windows=[{'start': "01:30", 'end': "02:30"}],
+                                 session_duration=3540)
+        view = promo.simulate(path, berlin('2026-03-29T01:29:00'), press_start=5, hours=3)
+        (shown, _), = calls(view, 'show_promo')
+        (started, _), = calls(view, 'show_countdown')
+        (ended, _), = calls(view, 'show_time_up')
+        local = lambda timestamp: datetime.datetime.fromtimestamp(timestamp, BERLIN).strftime('%H:%M:%S %Z')
+        self.assertEqual(local(shown), "01:30:00 CET")
+        self.assertEqual(local(started), "01:30:05 CET")
+        self.assertTrue(near(ended - started, 3540))
+        self.assertEqual(local(ended)[:5], "03:29")
+        self.assertEqual(self.countdown_texts(view), [promo.format_clock(s) for s in range(3540, 0, -1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
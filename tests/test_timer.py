@@ -0,0 +1,60 @@
+"""TimerEngine on a virtual clock"""
+import unittest
+
+import promo
+
+
+class TimerEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = promo.VirtualClock(1000.0)
+        self.timer = promo.TimerEngine(60, self.clock)
+
+    def test_counts_down_on_the_clock(self):
+        self.timer.start()
+        self.clock.advance(10.2)
+        self.assertEqual(self.timer.seconds_left(), 50)
+        self.assertAlmostEqual(self.timer.remaining(), 49.8)
+
+    def test_pause_and_resume(self):
+        self.timer.start()
+        self.clock.advance(10)
+        self.timer.pause()
+        self.clock.advance(100)
+        self.assertTrue(self.timer.is_paused())
+        self.assertEqual(self.timer.seconds_left(), 50)
+        self.timer.resume()
+        self.clock.advance(10)
+        self.assertEqual(self.timer.seconds_left(), 40)
+
+    def test_extend(self):
+        self.timer.start()
+        self.clock.advance(50)
+        self.timer.extend(30)
+        self.assertEqual(self.timer.seconds_left(), 40)
+        # Extending a finished countdown restarts it from now
+        self.clock.advance(100)
+        self.timer.extend(20)
+        self.assertEqual(self.timer.seconds_left(), 20)
+
+    def test_stop(self):
+        self.timer.start()
+        self.clock.advance(5)
+        self.timer.stop()
+        self.assertTrue(self.timer.is_stopped())
+        self.assertEqual(self.timer.seconds_left(), 0)
+
+    def test_phase_aligns_the_deadline(self):
+        clock = promo.VirtualClock(1000.25)
+        timer = promo.TimerEngine(60, clock, phase=0.5)
+        timer.start()
+        self.assertAlmostEqual(clock.time() + timer.remaining(), 1060.5)
+        clock.advance(10.1)
+        timer.pause()
+        clock.advance(0.3)
+        timer.resume()
+        self.assertAlmostEqual((clock.time() + timer.remaining()) % 1, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()